@@ -10,6 +10,7 @@ from datacube.core.cache.cache_manager import CACHE_DIR
 from datacube.core.logging.logger import CustomLogger as Logger
 from datacube.rest import ROUTERS
 from datacube.rest.exception_handler import EXCEPTION_HANDLERS
+from datacube.rest.ogc.job_manager import JobManager
 from datacube.rest.server.server_configuration import ServerConfiguration
 
 LOGGER_CONFIG_FILE = "configs/logging.json"
@@ -34,6 +35,11 @@ else:
         os.remove(os.path.join(CACHE_DIR, f))
 
 
+# Set up job store and workers for asynchronous executions
+JobManager.init(ServerConfiguration.get_job_store(),
+                ServerConfiguration.get_job_workers())
+
+
 # Create app and add routes
 app = FastAPI(debug=conf.dc3_builder.debug)
 
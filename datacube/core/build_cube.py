@@ -1,56 +1,99 @@
 #!/usr/bin/python3
 import base64
+import fcntl
+import hashlib
 import os
 import os.path as path
 import shutil
-import time
 import traceback
+from collections import Counter
+from contextlib import contextmanager
+from typing import Iterator
 from urllib.parse import urlparse
 
-import mr4mp
+import attrs
 import numpy as np
 import xarray as xr
-from shapely.geometry import Point
+from shapely.geometry import Point, Polygon
 
+from datacube.core.cache.archive_cache import ArchiveCache
+from datacube.core.cache.build_manifest import (BuildManifest,
+                                                GranuleCheckpoint,
+                                                GridCheckpoint)
 from datacube.core.cache.cache_manager import CacheManager
+from datacube.core.execution.utils import get_executor
+from datacube.core.geo.grid import CubeGrid
 from datacube.core.geo.utils import complete_grid
-from datacube.core.geo.xarray import (get_bounds, get_chunk_shape,
-                                      merge_datasets)
+from datacube.core.geo.xarray import (GridMosaic, get_bounds,
+                                      get_chunk_shape, get_itemsize)
 from datacube.core.logging.logger import CustomLogger as Logger
-from datacube.core.metadata import create_datacube_metadata
+from datacube.core.metadata import (create_datacube_metadata,
+                                    update_datacube_metadata)
 from datacube.core.models.cubeBuildResult import CubeBuildResult
 from datacube.core.models.enums import ChunkingStrategy as CStrat
-from datacube.core.models.exception import (DownloadError, MosaickingError,
-                                            UploadError)
+from datacube.core.models.exception import (BadRequest, DownloadError,
+                                            MosaickingError, UploadError)
+from datacube.core.models.metadata import DatacubeMetadata
 from datacube.core.models.request.cubeBuild import ExtendedCubeBuildRequest
+from datacube.core.models.request.rasterFile import RasterFile
 from datacube.core.pivot.format import pivot_format_datacube
+from datacube.core.rasters.profile import read_raster_profiles
 from datacube.core.storage.utils import (create_input_storage,
-                                         get_mapper_output, write_bytes)
-from datacube.core.utils import (get_eval_formula, get_product_bands,
-                                 get_raster_driver)
+                                         get_mapper_output,
+                                         get_output_chunk_size,
+                                         is_output_storage_local, open_output,
+                                         write_bytes)
+from datacube.core.storage.upload import move_zarr, upload_zarr
+from datacube.core.utils import get_product_bands, get_raster_driver
 from datacube.core.visualisation.preview import (create_preview_b64,
                                                  create_preview_b64_cmap,
                                                  prepare_visualisation)
+from datacube.core.writer import SliceWriter
 
 TMP_DIR = "tmp/"
+SLICES_DIR = "slices"
+DATACUBE_DIR = "datacube"
+LOCK_SUFFIX = ".lock"
 LOGGER = Logger.get_logger()
 CACHE = {}
 
 
-def __download(input: tuple[ExtendedCubeBuildRequest, int, int]) \
-        -> dict[float, list[str]]:
+@attrs.frozen
+class RasterTask:
+    """
+    Information needed to build the zarr of a raster file, sent to the
+    executor instead of the whole request.
+    """
+    group_idx: int
+    file_idx: int
+    raster_file: RasterFile
+    timestamp: int
+    bands: dict[str, str]
+    datacube_path: str
+    target_resolution: int
+    target_projection: str
+    roi_polygon: Polygon
+    grid: CubeGrid | None
+    memory_budget: int | None
+    band_workers: int
+
+
+def __raster_zarr_root(task: RasterTask) -> str:
+    return path.join(TMP_DIR, f"{task.datacube_path}",
+                     f'{task.group_idx}/{task.file_idx}')
+
+
+def __download(task: RasterTask) -> dict[float, list[str]]:
     """
     Builds a zarr corresponding to the requested bands for
     the raster file 'file_idx' in the group 'group_idx'
     """
-    request = input[0]
-    group_idx = input[1]
-    file_idx = input[2]
+    group_idx = task.group_idx
+    file_idx = task.file_idx
 
     try:
-        # Retrieve from the request the important information
-        raster_file = request.composition[group_idx].rasters[file_idx]
-        timestamp = request.composition[group_idx].timestamp
+        raster_file = task.raster_file
+        timestamp = task.timestamp
 
         input_storage = create_input_storage(
             urlparse(raster_file.path).scheme)
@@ -58,19 +101,18 @@ def __download(input: tuple[ExtendedCubeBuildRequest, int, int]) \
         LOGGER.info(f"[group-{group_idx}:file-{file_idx}] Extracting bands")
         # Depending on archive type, extract desired data
         raster_archive = get_raster_driver(raster_file.type)(
-            input_storage, raster_file.path,
-            get_product_bands(request, raster_file.type),
-            request.target_resolution,
-            timestamp, TMP_DIR)
+            input_storage, raster_file.path, task.bands,
+            task.target_resolution, timestamp, TMP_DIR)
 
         LOGGER.info(f"[group-{group_idx}:file-{file_idx}] Building ZARR")
         # Build the zarr dataset and add it to its group's list
-        zarr_root_path = path.join(TMP_DIR, f"{request.datacube_path}",
-                                   f'{group_idx}/{file_idx}')
-        zarr_path = raster_archive.build_zarr(zarr_root_path,
-                                              request.target_projection,
-                                              polygon=request.roi_polygon)
-        CacheManager.put_raster(raster_archive)
+        zarr_root_path = __raster_zarr_root(task)
+        zarr_path = raster_archive.build_zarr(
+            zarr_root_path, task.target_projection,
+            polygon=task.roi_polygon, grid=task.grid,
+            memory_budget=task.memory_budget,
+            band_workers=task.band_workers)
+        CacheManager.put_raster(task.datacube_path, raster_archive)
 
         grouped_datasets: dict[int, list[str]] = {timestamp: [zarr_path]}
         return grouped_datasets
@@ -87,7 +129,7 @@ def merge_download(result_a: dict[int, list[str]],
                    result_b: dict[int, list[str]]) \
                    -> dict[int, list[str]]:
     """
-    Merge the results of the download method in a mapreduce process
+    Merge the results of the download method of the rasters of a granule
     """
     for timestamp in list(result_b.keys()):
         if timestamp in list(result_a.keys()):
@@ -101,186 +143,484 @@ def __mosaicking(merge_input) -> xr.Dataset:
     list_ds_adress = merge_input[0]
     lon = merge_input[1]
     lat = merge_input[2]
-    lon_step = merge_input[3]
-    lat_step = merge_input[4]
 
-    merged_dataset = None
+    # Paste every granule at its position on the grid of the datacube
+    mosaic = GridMosaic(lon, lat)
     for ds_adress in list_ds_adress:
-        # Interpolate the granule with new grid on its extent
         with xr.open_zarr(ds_adress) as dataset:
-            bounds = get_bounds(dataset)
-            granule_grid = {}
-            granule_grid["x"] = lon[(lon[:] >= bounds[0])
-                                    & (lon[:] <= bounds[2])]
-            granule_grid["y"] = lat[(lat[:] >= bounds[1])
-                                    & (lat[:] <= bounds[3])]
-            granule_grid["x"], granule_grid["y"] = complete_grid(
-                granule_grid["x"], granule_grid["y"],
-                lon_step, lat_step, bounds)
-            dims = {"x": len(granule_grid["x"]),
-                    "y": len(granule_grid["y"]), "t": 1}
-
-            merged_dataset = merge_datasets(
-                merged_dataset,
-                dataset.interp_like(
-                    xr.Dataset(granule_grid), method="nearest")
-                .chunk(get_chunk_shape(dims, CStrat.SPINACH)))
+            mosaic.paste(dataset)
 
-    return merged_dataset
+    merged_dataset = mosaic.to_dataset()
+    return merged_dataset.chunk(get_chunk_shape(
+        merged_dataset.dims, CStrat.SPINACH, get_itemsize(merged_dataset)))
 
 
-def __merge_mosaicking(mosaick_a: xr.Dataset,
-                       mosaick_b: xr.Dataset) -> xr.Dataset:
-    return xr.combine_by_coords(
-        (mosaick_a, mosaick_b), combine_attrs="override")
-
+def __write_slice(slice_input) -> tuple[int, str]:
+    """
+    Mosaicks the zarrs of a time slice on the grid and writes it,
+    then removes the zarrs of its rasters.
+    """
+    timestamp, ds_list, lon, lat, slice_path = slice_input
+    __mosaicking([ds_list, lon, lat]) \
+        .to_zarr(slice_path, mode="w") \
+        .close()
+    for ds_adress in ds_list:
+        shutil.rmtree(path.dirname(ds_adress), ignore_errors=True)
+    return timestamp, slice_path
+
+
+def __download_all(download_iter: list[RasterTask],
+                   manifest: BuildManifest) \
+        -> Iterator[dict[int, list[str]]]:
+    """
+    Downloads the rasters, yielding their zarrs as soon as they are ready.
+    The rasters downloaded by a previous run of the build are reused.
+    """
+    tasks = {}
+    for task in download_iter:
+        datasets = manifest.get_datasets(__raster_zarr_root(task))
+        if datasets is None:
+            tasks[__raster_zarr_root(task)] = task
+        else:
+            yield datasets
+
+    for result in get_executor().imap_unordered(__download,
+                                                list(tasks.values())):
+        zarr_root = path.dirname(next(iter(result.values()))[0])
+        task = tasks[zarr_root]
+        manifest.add_granule(zarr_root, GranuleCheckpoint(
+            path=task.raster_file.path, datasets=result,
+            raster=CacheManager.read(task.datacube_path,
+                                     task.raster_file.path)))
+        yield result
+    LOGGER.info(f"Archive cache: {ArchiveCache.stats()}")
+
+
+def __pipeline_on_grid(download_iter: list[RasterTask], grid: CubeGrid,
+                       zarr_root_path: str, writer: SliceWriter,
+                       manifest: BuildManifest):
+    """
+    Downloads the rasters and mosaicks each time slice on the grid as soon
+    as all of its rasters are ready, while the others are downloaded.
+    """
+    # The time slices mosaicked by a previous run of the build are skipped
+    done = manifest.done()
+    download_iter = [task for task in download_iter
+                     if task.timestamp not in done]
+    remaining = Counter(task.timestamp for task in download_iter)
+    # Rasters are mosaicked in the order of the request, whatever the
+    # order in which they are ready
+    order = {__raster_zarr_root(task): idx
+             for idx, task in enumerate(download_iter)}
+    grouped_datasets: dict[int, list[str]] = {}
 
-def build_datacube(request: ExtendedCubeBuildRequest):
+    for result in __download_all(download_iter, manifest):
+        for timestamp, ds_list in result.items():
+            grouped_datasets.setdefault(timestamp, []).extend(ds_list)
+            remaining[timestamp] -= len(ds_list)
+            if remaining[timestamp] > 0:
+                continue
+
+            LOGGER.info(f"[slice-{timestamp}] Mosaicking")
+            try:
+                slice_path = __write_slice([
+                    timestamp,
+                    sorted(grouped_datasets.pop(timestamp),
+                           key=lambda ds: order[path.dirname(ds)]),
+                    grid.x, grid.y,
+                    path.join(zarr_root_path, SLICES_DIR, str(timestamp))])[1]
+            except Exception as e:
+                LOGGER.error(e)
+                traceback.print_exc()
+                raise MosaickingError(detail=e.args[0])
+            writer.add(timestamp, slice_path)
+
+
+def __barrier_on_granule_grid(request: ExtendedCubeBuildRequest,
+                              download_iter: list[RasterTask],
+                              zarr_root_path: str, writer: SliceWriter,
+                              manifest: BuildManifest) \
+        -> tuple[float, float]:
+    """
+    Downloads all the rasters, then mosaicks them on a grid based on
+    the raster closest to the center of the ROI.
+    """
     grouped_datasets: dict[int, list[str]] = {}
 
     center_granule_idx = {"group": int, "index": int}
     xmin, ymin, xmax, ymax = np.inf, np.inf, -np.inf, -np.inf
     roi_centroid: Point = request.roi_polygon.centroid
     min_distance = np.inf
+    single_raster = len(request.composition) == 1 and \
+        len(request.composition[0].rasters) == 1
 
-    zarr_root_path = path.join(TMP_DIR, request.datacube_path)
-    # Remove trailing "/" if present
-    zarr_root_path = zarr_root_path if zarr_root_path[-1] != "/" \
-        else zarr_root_path[:-2]
-
-    # Generate the iterable of all files to download
-    download_iter = []
-    for group_idx in range(len(request.composition)):
-        for idx in range(len(request.composition[group_idx].rasters)):
-            download_iter.append((request, group_idx, idx))
+    # The time slices mosaicked by a previous run of the build are skipped,
+    # its grid being kept
+    done = manifest.done()
+    download_iter = [task for task in download_iter
+                     if task.timestamp not in done]
 
     # Download parallely the groups of bands of each file
-    try:
-        with mr4mp.pool(close=True) as pool:
-            grouped_datasets = pool.mapreduce(
-                __download, merge_download, download_iter)
-    except DownloadError as e:
-        raise e
-
-    for timestamp, ds_list in grouped_datasets.items():
-        for idx, ds_adress in enumerate(ds_list):
-            # Find the centermost granule based on ROI and max bounds
-            with xr.open_zarr(ds_adress) as dataset:
-                ds_bounds = get_bounds(dataset)
-                granule_center = Point((ds_bounds[0] + ds_bounds[2])/2,
-                                       (ds_bounds[1] + ds_bounds[3])/2)
-                if roi_centroid.distance(granule_center) < min_distance:
-                    min_distance = roi_centroid.distance(granule_center)
-                    center_granule_idx["group"] = timestamp
-                    center_granule_idx["index"] = idx
-
-                # Update the extent of the datacube
-                xmin = min(xmin, ds_bounds[0])
-                ymin = min(ymin, ds_bounds[1])
-                xmax = max(xmax, ds_bounds[2])
-                ymax = max(ymax, ds_bounds[3])
-
-    LOGGER.info("Building datacube from the ZARRs")
-    # If there is more than one file requested
-    if not (len(request.composition) == 1 and
-            len(request.composition[0].rasters) == 1):
-        try:
-            # Generate a grid based on the step size of the center granule
-            # extending the center of the roi
-            with xr.open_zarr(grouped_datasets[center_granule_idx["group"]][
-                        center_granule_idx["index"]]) as center_granule_ds:
-                lon_step = float(center_granule_ds.get("x").diff("x").mean()
+    for result in __download_all(download_iter, manifest):
+        grouped_datasets = merge_download(grouped_datasets, result)
+    # Rasters are mosaicked in the order of the request, whatever the
+    # order in which they are ready
+    order = {__raster_zarr_root(task): idx
+             for idx, task in enumerate(download_iter)}
+    for ds_list in grouped_datasets.values():
+        ds_list.sort(key=lambda ds: order[path.dirname(ds)])
+
+    if manifest.grid is None:
+        for timestamp, ds_list in grouped_datasets.items():
+            for idx, ds_adress in enumerate(ds_list):
+                # Find the centermost granule based on ROI and max bounds
+                with xr.open_zarr(ds_adress) as dataset:
+                    ds_bounds = get_bounds(dataset)
+                    granule_center = Point((ds_bounds[0] + ds_bounds[2])/2,
+                                           (ds_bounds[1] + ds_bounds[3])/2)
+                    if roi_centroid.distance(granule_center) < min_distance:
+                        min_distance = roi_centroid.distance(granule_center)
+                        center_granule_idx["group"] = timestamp
+                        center_granule_idx["index"] = idx
+
+                    # Update the extent of the datacube
+                    xmin = min(xmin, ds_bounds[0])
+                    ymin = min(ymin, ds_bounds[1])
+                    xmax = max(xmax, ds_bounds[2])
+                    ymax = max(ymax, ds_bounds[3])
+
+        # If there is more than one file requested
+        if not single_raster:
+            try:
+                # Generate a grid based on the step size of the center
+                # granule extending the center of the roi
+                with xr.open_zarr(grouped_datasets[
+                        center_granule_idx["group"]][
+                            center_granule_idx["index"]]) \
+                        as center_granule_ds:
+                    lon_step = float(center_granule_ds.get("x").diff("x")
+                                     .mean().values.tolist())
+                    lat_step = float(center_granule_ds.get("y").diff("y")
+                                     .mean().values.tolist())
+
+                    lon, lat = complete_grid(
+                        [roi_centroid.x], [roi_centroid.y],
+                        lon_step, lat_step, (xmin, ymin, xmax, ymax))
+            except Exception as e:
+                LOGGER.error(e)
+                traceback.print_exc()
+                raise MosaickingError(detail=e.args[0])
+        else:
+            first_ds = grouped_datasets[list(grouped_datasets.keys())[0]][0]
+            with xr.open_zarr(first_ds) as ds:
+                lon, lat = ds.get("x").values, ds.get("y").values
+                lon_step = float(ds.get("x").diff("x").mean()
                                  .values.tolist())
-                lat_step = float(center_granule_ds.get("y").diff("y").mean()
+                lat_step = float(ds.get("y").diff("y").mean()
                                  .values.tolist())
 
-                lon, lat = complete_grid([roi_centroid.x], [roi_centroid.y],
-                                         lon_step, lat_step,
-                                         (xmin, ymin, xmax, ymax))
+        manifest.grid = GridCheckpoint(x=lon.tolist(), y=lat.tolist(),
+                                       x_step=lon_step, y_step=lat_step)
+        manifest.save()
+    else:
+        lon, lat = np.array(manifest.grid.x), np.array(manifest.grid.y)
+        lon_step, lat_step = manifest.grid.x_step, manifest.grid.y_step
 
+    LOGGER.info("Building datacube from the ZARRs")
+    if not single_raster:
+        try:
             # For each time bucket, create a mosaick of the datasets
             timestamps = list(grouped_datasets.keys())
             timestamps.sort()
 
             mosaicking_iter = []
             for t in timestamps:
-                mosaicking_iter.append([grouped_datasets[t], lon, lat,
-                                       lon_step, lat_step])
+                mosaicking_iter.append([
+                    t, grouped_datasets[t], lon, lat,
+                    path.join(zarr_root_path, SLICES_DIR, str(t))])
 
-            with mr4mp.pool(close=True) as pool:
-                datacube = pool.mapreduce(__mosaicking, __merge_mosaicking,
-                                          mosaicking_iter)
+            slices = get_executor().imap_unordered(
+                __write_slice, mosaicking_iter)
+            for timestamp, slice_path in slices:
+                writer.add(timestamp, slice_path)
 
         except Exception as e:
             LOGGER.error(e)
             traceback.print_exc()
+            if isinstance(e, UploadError):
+                raise e
             raise MosaickingError(detail=e.args[0])
     else:
-        first_ds = grouped_datasets[list(grouped_datasets.keys())[0]][0]
-        with xr.open_zarr(first_ds) as ds:
-            datacube = ds
-            lon_step = float(datacube.get("x").diff("x").mean()
-                             .values.tolist())
-            lat_step = float(datacube.get("y").diff("y").mean()
-                             .values.tolist())
-
-    # Compute the bands requested from the product bands
-    for band in request.bands:
-        datacube[band.name] = eval(
-            get_eval_formula(band.expression, request.aliases))
-        if band.min is not None and band.max is not None:
-            datacube[band.name] = datacube[band.name].clip(band.min, band.max)
-
-    # Keep just the bands requested
-    requested_bands = [band.name for band in request.bands]
-    datacube = datacube[requested_bands]
+        for timestamp, ds_list in grouped_datasets.items():
+            writer.add(timestamp, ds_list[0])
 
-    # Add relevant datacube metadata
-    metadata = create_datacube_metadata(request, datacube, lon_step, lat_step)
-    datacube.attrs.update(metadata.dict(exclude_unset=True, by_alias=True))
-    datacube.attrs.update({"description": request.description})
+    return lon_step, lat_step
 
-    if request.pivot_format:
-        # Write datacube in tmp dir
-        final_datacube = f"{zarr_root_path}_{str(time.time())}"
-        datacube.chunk(get_chunk_shape(
-                datacube.dims, request.chunking_strategy)) \
-            .to_zarr(final_datacube, mode="w") \
-            .close()
 
-        # Format datacube to pivot
-        pivot_path, preview_file_name, preview = pivot_format_datacube(
-            request, final_datacube, metadata)
-        shutil.rmtree(final_datacube)
+def __prepare_update(request: ExtendedCubeBuildRequest,
+                     existing: xr.Dataset) \
+        -> tuple[DatacubeMetadata, CubeGrid, int]:
+    """
+    Checks that the request can be appended to the existing datacube and
+    keeps only the groups of its composition more recent than the datacube.
+    Returns the metadata, the grid and the number of time slices of the
+    existing datacube.
+    """
+    try:
+        metadata = DatacubeMetadata(**existing.attrs)
+    except Exception as e:
+        raise BadRequest(title="Datacube can't be updated",
+                         detail=f"Invalid metadata: {e}")
+
+    x_dim = metadata.dimensions["x"]
+    if str(x_dim.reference_system) != request.target_projection:
+        raise BadRequest(title="Datacube can't be updated",
+                         detail="Its projection is " +
+                                f"{x_dim.reference_system}")
+    # The rasters are projected on the grid of the datacube, whose pixels
+    # have to be regularly spaced squares, as those of a datacube built
+    # with a target grid
+    x, y = existing.get("x").values, existing.get("y").values
+    steps = np.concatenate([np.diff(x), np.diff(y)])
+    if len(x) < 2 or len(y) < 2 or steps[0] <= 0 or \
+            not np.allclose(steps, steps[0], rtol=1e-3, atol=0):
+        raise BadRequest(title="Datacube can't be updated",
+                         detail="Its grid is not a regular grid of square " +
+                                "pixels, it has to be built with " +
+                                "target_grid to be updated")
+    if set(existing.data_vars) != {band.name for band in request.bands} or \
+            any(metadata.variables[band.name].expression != band.expression
+                for band in request.bands):
+        raise BadRequest(title="Datacube can't be updated",
+                         detail="Its bands are " +
+                                ", ".join(f"{name}: {variable.expression}"
+                                          for name, variable
+                                          in metadata.variables.items()))
+    if metadata.chunking_strategy not in (None, request.chunking_strategy):
+        raise BadRequest(title="Datacube can't be updated",
+                         detail="Its chunking strategy is " +
+                                metadata.chunking_strategy.value)
+
+    # The groups already in the datacube are skipped. Its time slices are
+    # those of its composition: the slices after them were appended by an
+    # update that failed before writing the metadata, and are overwritten
+    timestamps = {group.timestamp for group in metadata.composition}
+    last_timestamp = max(timestamps)
+    request.composition = [group for group in request.composition
+                           if group.timestamp not in timestamps]
+    if not request.composition:
+        raise BadRequest(title="Datacube is up to date",
+                         detail="All the groups are already in the datacube")
+    for group in request.composition:
+        if group.timestamp <= last_timestamp:
+            raise BadRequest(title="Datacube can't be updated",
+                             detail=f"Group {group.timestamp} is older " +
+                                    "than the datacube")
+
+    return metadata, CubeGrid(x=x, y=y, step=float(steps[0])), \
+        len(timestamps)
+
+
+def __skip_rasters_outside_roi(request: ExtendedCubeBuildRequest) \
+        -> list[str]:
+    """
+    Removes from the composition the rasters whose footprint, read from
+    their metadata, doesn't intersect the ROI, and the groups left empty.
+    Returns the rasters removed.
+    """
+    skipped = []
+    composition = []
+    for group, profiles in zip(request.composition,
+                               read_raster_profiles(request, TMP_DIR)):
+        rasters = []
+        for raster_file, profile in zip(group.rasters, profiles):
+            if profile.intersects(request.roi_polygon,
+                                  request.target_projection):
+                rasters.append(raster_file)
+            else:
+                skipped.append(raster_file.path)
+        if rasters:
+            group.rasters = rasters
+            composition.append(group)
+
+    if not composition:
+        raise BadRequest(title="No raster intersects the ROI",
+                         detail=", ".join(skipped))
+    if skipped:
+        LOGGER.info(f"Skipping {len(skipped)} raster(s) " +
+                    "not intersecting the ROI")
+    request.composition = composition
+    return skipped
+
+
+@contextmanager
+def __datacube_lock(zarr_root_path: str) -> Iterator[None]:
+    """
+    Exclusive lock on the working directory of the builds of a datacube,
+    shared between threads and processes.
+    """
+    os.makedirs(path.dirname(zarr_root_path) or ".", exist_ok=True)
+    with open(f"{zarr_root_path}{LOCK_SUFFIX}", "w") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
 
-        LOGGER.info("Writing datacube in pivot format to storage")
+
+def build_datacube(request: ExtendedCubeBuildRequest):
+    zarr_root_path = path.join(TMP_DIR, request.datacube_path)
+    # Remove trailing "/" if present
+    zarr_root_path = zarr_root_path if zarr_root_path[-1] != "/" \
+        else zarr_root_path[:-2]
+
+    # The builds of a same datacube share its working directory and its
+    # output, so they are run one after the other
+    with __datacube_lock(zarr_root_path):
+        return __build_datacube(request, zarr_root_path)
+
+
+def __build_datacube(request: ExtendedCubeBuildRequest,
+                     zarr_root_path: str) -> CubeBuildResult:
+    existing_metadata, offset = None, 0
+    if request.update:
+        # The groups are appended on the grid of the existing datacube
+        if request.pivot_format:
+            raise BadRequest(title="Datacube can't be updated",
+                             detail="Datacubes in pivot format can't be " +
+                                    "updated")
         try:
-            with open(pivot_path, 'rb') as ftar:
-                product_url = write_bytes(pivot_path.split("/")[-1],
-                                          ftar.read())
-                preview_url = path.join(product_url, preview_file_name)
-            os.remove(pivot_path)
+            product_url, store = get_mapper_output(request.datacube_path)
+            existing = xr.open_zarr(store)
+        except Exception as e:
+            raise BadRequest(title="Datacube not found",
+                             detail=f"{request.datacube_path}: {e}")
+        existing_metadata, grid, offset = __prepare_update(request,
+                                                           existing)
+    else:
+        # Choose the grid of the datacube before any download if requested
+        grid = CubeGrid.from_roi(request.roi_polygon,
+                                 request.target_resolution,
+                                 request.target_projection) \
+            if request.target_grid else None
+
+    skipped_rasters = __skip_rasters_outside_roi(request)
 
+    # Generate the iterable of all files to download, with only the product
+    # bands referenced by the bands of the datacube, planned once per type
+    download_iter = []
+    product_bands: dict[str, dict[str, str]] = {}
+    for group_idx, group in enumerate(request.composition):
+        for idx, raster_file in enumerate(group.rasters):
+            type_key = raster_file.type.to_key()
+            if type_key not in product_bands:
+                product_bands[type_key] = get_product_bands(
+                    request, raster_file.type)
+            download_iter.append(RasterTask(
+                group_idx=group_idx, file_idx=idx, raster_file=raster_file,
+                timestamp=group.timestamp,
+                bands=product_bands[type_key],
+                datacube_path=request.datacube_path,
+                target_resolution=request.target_resolution,
+                target_projection=request.target_projection,
+                roi_polygon=request.roi_polygon, grid=grid,
+                memory_budget=request.reprojection_memory,
+                band_workers=request.band_workers))
+
+    # Resume the previous run of the build of the same request if any
+    request_hash = hashlib.sha256(request.json(exclude={
+        "roi_polygon", "rgb", "band_workers", "resumable"}).encode()) \
+        .hexdigest()
+    if request.resumable:
+        manifest = BuildManifest.load(zarr_root_path, request_hash)
+        # Restore the metadata of the rasters downloaded by the previous run
+        for granule in manifest.granules.values():
+            CacheManager.put(request.datacube_path, granule.path,
+                             granule.raster)
+    else:
+        manifest = BuildManifest(request_hash=request_hash)
+
+    # The time slices are written to the datacube as they are mosaicked.
+    # A new datacube is written in tmp dir, then moved to a local storage
+    # or uploaded in parallel to an object store once complete, so that a
+    # failed build leaves the datacube previously built at its path whole
+    staged = not request.update
+    if staged:
+        final_datacube = path.join(zarr_root_path, DATACUBE_DIR)
+        store = final_datacube
+    if not request.update and not request.pivot_format:
+        LOGGER.info("Writing datacube to storage")
+        try:
+            product_url, output_store = get_mapper_output(
+                request.datacube_path)
         except Exception as e:
             LOGGER.error(e)
             traceback.print_exc()
             raise UploadError(detail=f"Datacube: {e.args[0]}")
+    writer = SliceWriter(request, store,
+                         [group.timestamp for group in request.composition],
+                         get_output_chunk_size(), manifest, offset)
+
+    if grid is not None:
+        # The grid being known, the download and the mosaicking of the
+        # time slices are pipelined
+        __pipeline_on_grid(download_iter, grid, zarr_root_path, writer,
+                           manifest)
+        lon_step, lat_step = grid.step, grid.step
+    else:
+        lon_step, lat_step = __barrier_on_granule_grid(
+            request, download_iter, zarr_root_path, writer, manifest)
+    writer.close()
 
+    # Add relevant datacube metadata
+    datacube = xr.open_zarr(store)
+    if existing_metadata is None:
+        metadata = create_datacube_metadata(request, datacube,
+                                            lon_step, lat_step)
+        description = request.description
     else:
-        LOGGER.info("Writing datacube to storage")
+        metadata = update_datacube_metadata(request, datacube,
+                                            existing_metadata,
+                                            lon_step, lat_step)
+        description = request.description or \
+            existing.attrs.get("description")
+    datacube.attrs = metadata.dict(exclude_unset=True, by_alias=True)
+    datacube.attrs.update({"description": description})
+    writer.write_attrs(datacube)
+
+    if staged and not request.pivot_format:
+        LOGGER.info("Uploading datacube to storage")
         try:
-            product_url, mapper = get_mapper_output(request.datacube_path)
+            if is_output_storage_local():
+                move_zarr(final_datacube, output_store)
+                datacube = xr.open_zarr(output_store)
+            else:
+                upload_zarr(final_datacube, output_store)
+        except Exception as e:
+            LOGGER.error(e)
+            traceback.print_exc()
+            raise UploadError(detail=f"Datacube: {e.args[0]}")
 
-            datacube.chunk(get_chunk_shape(
-                    datacube.dims, request.chunking_strategy)) \
-                .to_zarr(mapper, mode="w") \
-                .close()
+    if request.pivot_format:
+        # Format datacube to pivot
+        archive = pivot_format_datacube(request, final_datacube, metadata)
+        preview = archive.preview
 
+        # The archive is tarred as it is uploaded
+        LOGGER.info("Writing datacube in pivot format to storage")
+        try:
+            with open_output(archive.name) as (product_url, fb):
+                archive.write(fb)
+            preview_url = path.join(product_url, archive.preview_name)
         except Exception as e:
             LOGGER.error(e)
             traceback.print_exc()
             raise UploadError(detail=f"Datacube: {e.args[0]}")
+        finally:
+            archive.remove()
+        shutil.rmtree(final_datacube)
 
+    else:
         preview_file_name = f"{request.datacube_path}.jpg"
 
         # Creating preview
@@ -315,4 +655,5 @@ def build_datacube(request: ExtendedCubeBuildRequest):
     return CubeBuildResult(
         product_url=product_url,
         preview_url=preview_url,
-        preview=preview)
+        preview=preview,
+        skipped_rasters=skipped_rasters or None)
@@ -0,0 +1,178 @@
+import fcntl
+import hashlib
+import json
+import os
+import os.path as path
+import shutil
+import tempfile
+import time
+from contextlib import contextmanager
+from typing import Callable, Iterator
+
+from pydantic import BaseModel, Field
+
+from datacube.core.logging.logger import CustomLogger as Logger
+from datacube.core.storage.utils import get_archive_cache_conf
+
+LOGGER = Logger.get_logger()
+
+LOCK_FILE = ".lock"
+STATS_FILE = ".stats.json"
+# Entries used more recently than this (in seconds) are never evicted,
+# as they may be about to be read by another worker
+EVICTION_GRACE = 3600
+
+
+class ArchiveCacheStats(BaseModel):
+    hits: int = Field(default=0)
+    misses: int = Field(default=0)
+    evictions: int = Field(default=0)
+    entries: int = Field(default=0)
+    size: int = Field(default=0, description="Size of the cache in bytes")
+
+
+class ArchiveCache:
+    """
+    On-disk cache of the files extracted from the raster archives.
+
+    Entries are addressed by the hash of the archive's location, of its
+    fingerprint (ETag, size, ...) and of the member's name, so that a
+    modified archive never serves stale files. The cache is bounded in
+    bytes, evicting the least recently used entries, and can be shared by
+    concurrent workers.
+    """
+
+    @classmethod
+    def get_member(cls, archive_uri: str, fingerprint: str, member: str,
+                   extract: Callable[[str], None]) -> str:
+        """
+        Returns the path of the cached member of the archive.
+        On a miss, 'extract' is called to write the member at the given path.
+        """
+        cache_dir = get_archive_cache_conf()["directory"]
+        key = hashlib.sha256(
+            f"{archive_uri}|{fingerprint}|{member}".encode()).hexdigest()
+        entry_dir = path.join(cache_dir, key)
+        # Keep the name of the file, as its extension is used by readers
+        entry_path = path.join(entry_dir, path.basename(member))
+
+        with cls.__lock(cache_dir):
+            hit = path.exists(entry_path)
+            if hit:
+                # Mark the entry as the most recently used
+                os.utime(entry_dir)
+        if hit:
+            cls.__update_stats(cache_dir, hits=1)
+            return entry_path
+
+        # Extract in a temporary location, then publish atomically
+        os.makedirs(cache_dir, exist_ok=True)
+        # The temporary directory is unique to the extraction, as the threads
+        # of a process may extract the same member concurrently
+        tmp_dir = tempfile.mkdtemp(prefix=f"{key}.", suffix=".tmp",
+                                   dir=cache_dir)
+        try:
+            extract(path.join(tmp_dir, path.basename(member)))
+            with cls.__lock(cache_dir):
+                if not path.exists(entry_path):
+                    shutil.rmtree(entry_dir, ignore_errors=True)
+                    os.rename(tmp_dir, entry_dir)
+        finally:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+
+        cls.__update_stats(cache_dir, misses=1)
+        cls.evict()
+        return entry_path
+
+    @classmethod
+    def evict(cls):
+        """
+        Removes the least recently used entries until the cache
+        fits in its configured size.
+        """
+        conf = get_archive_cache_conf()
+        cache_dir = conf["directory"]
+        max_size = conf["max_size"]
+
+        with cls.__lock(cache_dir):
+            entries = cls.__entries(cache_dir)
+            size = sum(map(lambda e: e[2], entries))
+            evictions = 0
+            now = time.time()
+            for entry_dir, last_use, entry_size in sorted(
+                    entries, key=lambda e: e[1]):
+                if size <= max_size:
+                    break
+                if now - last_use < EVICTION_GRACE:
+                    LOGGER.warning("Archive cache exceeds its maximum size " +
+                                   "with entries in use")
+                    break
+                shutil.rmtree(entry_dir, ignore_errors=True)
+                size -= entry_size
+                evictions += 1
+
+        if evictions:
+            cls.__update_stats(cache_dir, evictions=evictions)
+
+    @classmethod
+    def stats(cls) -> ArchiveCacheStats:
+        """
+        Returns the hit/miss statistics as well as the state of the cache.
+        """
+        cache_dir = get_archive_cache_conf()["directory"]
+        with cls.__lock(cache_dir):
+            stats = cls.__read_stats(cache_dir)
+            entries = cls.__entries(cache_dir)
+        stats.entries = len(entries)
+        stats.size = sum(map(lambda e: e[2], entries))
+        return stats
+
+    @classmethod
+    @contextmanager
+    def __lock(cls, cache_dir: str) -> Iterator[None]:
+        """
+        Exclusive lock on the cache, shared between processes.
+        """
+        os.makedirs(cache_dir, exist_ok=True)
+        with open(path.join(cache_dir, LOCK_FILE), "w") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    @staticmethod
+    def __entries(cache_dir: str) -> list[tuple[str, float, int]]:
+        """
+        Lists the entries of the cache as (directory, last use, size).
+        """
+        entries = []
+        for key in os.listdir(cache_dir):
+            entry_dir = path.join(cache_dir, key)
+            if key.startswith(".") or key.endswith(".tmp") \
+                    or not path.isdir(entry_dir):
+                continue
+            size = sum(path.getsize(path.join(entry_dir, f))
+                       for f in os.listdir(entry_dir))
+            entries.append((entry_dir, path.getmtime(entry_dir), size))
+        return entries
+
+    @staticmethod
+    def __read_stats(cache_dir: str) -> ArchiveCacheStats:
+        stats_path = path.join(cache_dir, STATS_FILE)
+        if not path.exists(stats_path):
+            return ArchiveCacheStats()
+        with open(stats_path, "r") as f:
+            return ArchiveCacheStats(**json.load(f))
+
+    @classmethod
+    def __update_stats(cls, cache_dir: str, hits: int = 0, misses: int = 0,
+                       evictions: int = 0):
+        with cls.__lock(cache_dir):
+            stats = cls.__read_stats(cache_dir)
+            stats.hits += hits
+            stats.misses += misses
+            stats.evictions += evictions
+            with open(path.join(cache_dir, STATS_FILE), "w") as f:
+                json.dump(stats.dict(include={"hits", "misses", "evictions"}),
+                          f)
@@ -0,0 +1,141 @@
+import json
+import os
+import os.path as path
+import shutil
+from urllib.parse import urlparse
+
+from pydantic import BaseModel, Field, PrivateAttr
+
+from datacube.core.logging.logger import CustomLogger as Logger
+from datacube.core.rasters.drivers.abstract import CachedAbstractRasterArchive
+from datacube.core.storage.utils import create_input_storage
+
+LOGGER = Logger.get_logger()
+
+MANIFEST_FILE = "manifest.json"
+
+
+def _fingerprint(raster_path: str) -> str | None:
+    """
+    Returns the current version of the raster archive in its storage,
+    None if it can't be read anymore.
+    """
+    try:
+        return create_input_storage(urlparse(raster_path).scheme) \
+            .fingerprint(raster_path)
+    except Exception as e:
+        LOGGER.warning(f"Can't get the version of {raster_path}: {e}")
+        return None
+
+
+class GranuleCheckpoint(BaseModel):
+    path: str = Field(description="Location of the raster file")
+    fingerprint: str | None = Field(
+        description="Version of the raster archive downloaded")
+    datasets: dict[int, list[str]] = Field(
+        description="Zarrs built from the raster, by timestamp")
+    raster: CachedAbstractRasterArchive = Field(
+        description="Metadata of the raster archive")
+
+
+class GridCheckpoint(BaseModel):
+    x: list[float] = Field()
+    y: list[float] = Field()
+    x_step: float = Field()
+    y_step: float = Field()
+
+
+class BuildManifest(BaseModel):
+    """
+    Checkpoints of a build: the rasters downloaded, the grid of the datacube
+    and the time slices mosaicked and written.
+
+    When saved in the working directory of the build, a failed build resumes
+    where it stopped if the same request, identified by its hash, is
+    submitted again. The work left by a different request is discarded.
+    """
+    request_hash: str = Field()
+    granules: dict[str, GranuleCheckpoint] = Field(
+        default={}, description="Rasters downloaded, by zarr root")
+    grid: GridCheckpoint | None = Field(
+        description="Grid computed from the rasters downloaded")
+    slices: dict[int, str] = Field(
+        default={}, description="Time slices mosaicked but not yet written")
+    written: list[int] = Field(
+        default=[], description="Time slices written to the datacube")
+    chunk_shape: dict[str, int] | None = Field(
+        description="Chunk shape of the datacube, once preallocated")
+
+    _work_dir: str | None = PrivateAttr(default=None)
+
+    @classmethod
+    def load(cls, work_dir: str, request_hash: str) -> "BuildManifest":
+        """
+        Loads the manifest of the build of the request from its working
+        directory, starting a new one if there is none.
+        """
+        manifest = None
+        manifest_path = path.join(work_dir, MANIFEST_FILE)
+        if path.exists(manifest_path):
+            with open(manifest_path, "r") as f:
+                manifest = cls(**json.load(f))
+
+        if manifest is None or manifest.request_hash != request_hash:
+            shutil.rmtree(work_dir, ignore_errors=True)
+            manifest = cls(request_hash=request_hash)
+        else:
+            LOGGER.info(f"Resuming build: {len(manifest.granules)} " +
+                        "raster(s) downloaded, " +
+                        f"{len(manifest.written)} time slice(s) written")
+
+        manifest._work_dir = work_dir
+        manifest.save()
+        return manifest
+
+    def save(self):
+        """
+        Writes the manifest in the working directory of the build,
+        if the build is resumable.
+        """
+        if self._work_dir is None:
+            return
+        os.makedirs(self._work_dir, exist_ok=True)
+        manifest_path = path.join(self._work_dir, MANIFEST_FILE)
+        with open(f"{manifest_path}.tmp", "w") as f:
+            f.write(self.json())
+        os.replace(f"{manifest_path}.tmp", manifest_path)
+
+    def done(self) -> set[int]:
+        """
+        Returns the timestamps of the time slices already mosaicked.
+        """
+        return set(self.slices) | set(self.written)
+
+    def get_datasets(self, zarr_root: str) -> dict[int, list[str]] | None:
+        """
+        Returns the zarrs of the raster if it was downloaded, they still
+        exist and the raster archive was not modified since.
+        """
+        granule = self.granules.get(zarr_root)
+        if granule is None or not all(
+                path.exists(ds) for ds_list in granule.datasets.values()
+                for ds in ds_list):
+            return None
+        # The raster is downloaded again if it was replaced since
+        fingerprint = _fingerprint(granule.path)
+        if fingerprint is None or fingerprint != granule.fingerprint:
+            LOGGER.info(f"{granule.path} changed since it was downloaded")
+            del self.granules[zarr_root]
+            self.save()
+            return None
+        return granule.datasets
+
+    def add_granule(self, zarr_root: str, granule: GranuleCheckpoint):
+        """
+        Records the raster as downloaded, with the version of its archive
+        if the build is resumable.
+        """
+        if self._work_dir is not None:
+            granule.fingerprint = _fingerprint(granule.path)
+        self.granules[zarr_root] = granule
+        self.save()
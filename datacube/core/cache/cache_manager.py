@@ -9,28 +9,47 @@ from datacube.core.rasters.drivers.abstract import (
 CACHE_DIR = "cache"
 
 
-def _uri2cache_path(uri: str) -> str:
+def _uri2cache_path(datacube_path: str, uri: str) -> str:
+    # The metadata are kept per datacube, as the builds of different
+    # datacubes may use the same raster at the same time
     return path.join(CACHE_DIR,
-                     hashlib.sha256(uri.encode()).hexdigest())
+                     hashlib.sha256(f"{datacube_path}\0{uri}".encode())
+                     .hexdigest())
 
 
 class CacheManager:
     @classmethod
-    def put_raster(cls, raster: AbstractRasterArchive):
+    def put_raster(cls, datacube_path: str, raster: AbstractRasterArchive):
         """
-        Stores a raster archive's metadata in a json file,
-        named after the hash of the archive's location.
+        Stores a raster archive's metadata for the build of a datacube in a
+        json file, named after the hash of the datacube's and the archive's
+        locations.
         """
-        with open(_uri2cache_path(raster.raster_uri), 'w') as f:
-            json.dump(raster.cache_information().dict(), f)
+        cls.put(datacube_path, raster.raster_uri, raster.cache_information())
 
     @classmethod
-    def get(cls, key) -> CachedAbstractRasterArchive:
+    def put(cls, datacube_path: str, key, raster: CachedAbstractRasterArchive):
+        """
+        Stores a cached raster archive's metadata under the location
+        of the archive.
+        """
+        with open(_uri2cache_path(datacube_path, key), 'w') as f:
+            json.dump(raster.dict(), f)
+
+    @classmethod
+    def read(cls, datacube_path: str, key) -> CachedAbstractRasterArchive:
+        """
+        Retrieve a cached raster archive's metadata, keeping it in the cache.
+        """
+        with open(_uri2cache_path(datacube_path, key), 'r') as f:
+            return CachedAbstractRasterArchive(**json.load(f))
+
+    @classmethod
+    def get(cls, datacube_path: str, key) -> CachedAbstractRasterArchive:
         """
         Retrieve a cached raster archive's metadata to be used for the cube's
         metadata construction. Also removes the metadata from the cache.
         """
-        with open(_uri2cache_path(key), 'r') as f:
-            raster = CachedAbstractRasterArchive(**json.load(f))
-        os.remove(_uri2cache_path(key))
+        raster = cls.read(datacube_path, key)
+        os.remove(_uri2cache_path(datacube_path, key))
         return raster
@@ -0,0 +1,78 @@
+import math
+from collections import Counter
+
+import numpy as np
+import xarray as xr
+
+from datacube.core.build_cube import TMP_DIR
+from datacube.core.geo.grid import CubeGrid
+from datacube.core.geo.xarray import get_chunk_shape
+from datacube.core.models.cubeBuildEstimate import CubeBuildEstimate
+from datacube.core.models.exception import BadRequest, DownloadError
+from datacube.core.models.request.cubeBuild import ExtendedCubeBuildRequest
+from datacube.core.rasters.profile import read_raster_profiles
+from datacube.core.storage.utils import get_output_chunk_size
+from datacube.core.utils import compute_bands
+
+
+def estimate_datacube(request: ExtendedCubeBuildRequest) \
+        -> CubeBuildEstimate:
+    """
+    Estimates the size of the datacube built from the request and the
+    bytes to download, from the metadata of the rasters only. The rasters
+    that don't intersect the ROI are skipped, as in the build.
+
+    The dimensions are those of the grid of the ROI, and the data types
+    of the bands those of the datacubes built on it.
+    """
+    timestamps = Counter()
+    profiles = []
+    skipped = []
+    for group, group_profiles in zip(request.composition,
+                                     read_raster_profiles(request, TMP_DIR)):
+        for profile in group_profiles:
+            if profile.intersects(request.roi_polygon,
+                                  request.target_projection):
+                timestamps[group.timestamp] += 1
+                profiles.append(profile)
+            else:
+                skipped.append(profile.path)
+    if not profiles:
+        raise BadRequest(title="No raster intersects the ROI",
+                         detail=", ".join(skipped))
+    # Unlike the build, the estimate can't do without their metadata
+    unread = [f"{profile.path}: {profile.error}" for profile in profiles
+              if profile.footprint is None]
+    if unread:
+        raise DownloadError(title="Metadata of the rasters not read",
+                            detail=", ".join(unread))
+
+    # The data types of the bands are found by computing them on empty
+    # product bands, read as floats for their pixels without data to be NaN
+    product_dtypes: dict[str, np.dtype] = {}
+    for profile in profiles:
+        for band, dtype in profile.dtypes.items():
+            product_dtypes[band] = np.result_type(
+                product_dtypes.get(band, dtype), dtype, np.float32)
+    bands = compute_bands(xr.Dataset({
+        band: (("x", "y", "t"), np.empty((0, 0, 0), dtype))
+        for band, dtype in product_dtypes.items()}), request)
+    itemsizes = [band.stored_dtype(bands[band.name].dtype).itemsize
+                 for band in request.bands]
+
+    grid = CubeGrid.from_roi(request.roi_polygon, request.target_resolution,
+                             request.target_projection)
+    dimensions = {"x": len(grid.x), "y": len(grid.y), "t": len(timestamps)}
+    chunk_shape = get_chunk_shape(dimensions, request.chunking_strategy,
+                                  max(itemsizes), get_output_chunk_size())
+
+    return CubeBuildEstimate(
+        dimensions=dimensions,
+        chunk_shape=chunk_shape,
+        number_of_chunks=math.prod(
+            math.ceil(dimensions[dim] / chunk_shape[dim])
+            for dim in dimensions),
+        output_bytes=math.prod(dimensions.values()) * sum(itemsizes),
+        input_bytes=sum(profile.band_files_size for profile in profiles),
+        granules_per_slice=dict(sorted(timestamps.items())),
+        skipped_rasters=skipped)
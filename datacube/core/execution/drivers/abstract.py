@@ -0,0 +1,22 @@
+import abc
+from typing import Any, Callable, Iterable, Iterator
+
+
+class AbstractExecutor(abc.ABC):
+    """
+    Backend on which the tasks of the datacube builds are executed.
+    Executors are created once and shared by all the builds.
+    """
+
+    def __init__(self, workers: int | None = None,
+                 memory_limit: int | None = None):
+        pass
+
+    @abc.abstractmethod
+    def imap_unordered(self, func: Callable[[Any], Any],
+                       iterable: Iterable) -> Iterator:
+        """
+        Applies 'func' to each element of 'iterable' concurrently,
+        yielding the results as soon as they are available. The tasks not
+        started yet are cancelled if a task fails.
+        """
@@ -0,0 +1,38 @@
+from typing import Any, Callable, Iterable, Iterator
+
+from datacube.core.execution.drivers.abstract import AbstractExecutor
+
+
+class DaskExecutor(AbstractExecutor):
+    """
+    Executes the tasks on a dask.distributed cluster: either the existing
+    cluster whose scheduler is at 'scheduler_address', possibly spread
+    across nodes, or a local cluster of 'workers' processes.
+    """
+
+    def __init__(self, workers: int | None = None,
+                 memory_limit: int | None = None,
+                 scheduler_address: str | None = None):
+        # dask.distributed is only required by this executor
+        from dask.distributed import Client, LocalCluster
+
+        if scheduler_address is not None:
+            self.client = Client(scheduler_address)
+        else:
+            self.client = Client(LocalCluster(
+                n_workers=workers, threads_per_worker=1,
+                memory_limit=memory_limit if memory_limit is not None
+                else "auto"))
+
+    def imap_unordered(self, func: Callable[[Any], Any],
+                       iterable: Iterable) -> Iterator:
+        from dask.distributed import as_completed
+
+        # Tasks are not deduplicated, as they write files
+        futures = self.client.map(func, list(iterable), pure=False)
+        try:
+            for future in as_completed(futures):
+                yield future.result()
+        finally:
+            # Do not keep the cluster busy once the results are not awaited
+            self.client.cancel(futures)
@@ -0,0 +1,32 @@
+import multiprocessing
+from functools import partial
+from typing import Any, Callable, Iterable, Iterator
+
+import dask
+
+from datacube.core.execution.drivers.abstract import AbstractExecutor
+
+
+def _run_synchronously(func: Callable[[Any], Any], x: Any) -> Any:
+    """
+    Runs the task with dask computing in the worker process itself, as the
+    pool of threads of dask that a forked process inherits has no threads.
+    """
+    with dask.config.set(scheduler="synchronous"):
+        return func(x)
+
+
+class Mr4mpExecutor(AbstractExecutor):
+    """
+    Creates a new pool of processes for each operation.
+    """
+
+    def __init__(self, workers: int | None = None,
+                 memory_limit: int | None = None):
+        self.workers = workers
+
+    def imap_unordered(self, func: Callable[[Any], Any],
+                       iterable: Iterable) -> Iterator:
+        with multiprocessing.Pool(self.workers) as pool:
+            yield from pool.imap_unordered(
+                partial(_run_synchronously, func), iterable)
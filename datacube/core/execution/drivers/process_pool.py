@@ -0,0 +1,57 @@
+import resource
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Iterable, Iterator
+
+import dask
+
+from datacube.core.execution.drivers.abstract import AbstractExecutor
+
+
+def _init_worker(memory_limit: int | None):
+    """
+    Caps the address space of the worker process, whose allocations beyond
+    it fail with a MemoryError. It is not a cap of its resident memory: the
+    memory mapped but not used (ie the stacks of threads, the arenas of
+    malloc) counts too.
+    Dask computes in the worker process itself, as the pool of threads of
+    dask that a forked process inherits has no threads.
+    """
+    dask.config.set(scheduler="synchronous")
+    if memory_limit is not None:
+        resource.setrlimit(resource.RLIMIT_AS, (memory_limit, memory_limit))
+
+
+class ProcessExecutor(AbstractExecutor):
+    """
+    Persistent pool of processes, shared by the builds, which avoids
+    spawning processes for each build.
+    """
+
+    def __init__(self, workers: int | None = None,
+                 memory_limit: int | None = None):
+        self.workers = workers
+        self.memory_limit = memory_limit
+        self.executor = self.__create_pool()
+
+    def __create_pool(self) -> ProcessPoolExecutor:
+        return ProcessPoolExecutor(max_workers=self.workers,
+                                   initializer=_init_worker,
+                                   initargs=(self.memory_limit,))
+
+    def imap_unordered(self, func: Callable[[Any], Any],
+                       iterable: Iterable) -> Iterator:
+        futures = []
+        try:
+            futures = [self.executor.submit(func, x) for x in iterable]
+            for future in as_completed(futures):
+                yield future.result()
+        except BrokenProcessPool:
+            # A worker died (ie killed when out of memory), the pool
+            # is replaced for the next builds
+            self.executor = self.__create_pool()
+            raise
+        finally:
+            # Do not keep the pool busy once the results are not awaited
+            for future in futures:
+                future.cancel()
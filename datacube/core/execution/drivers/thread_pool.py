@@ -0,0 +1,27 @@
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any, Callable, Iterable, Iterator
+
+from datacube.core.execution.drivers.abstract import AbstractExecutor
+
+
+class ThreadExecutor(AbstractExecutor):
+    """
+    Persistent pool of threads, shared by the builds. The memory limit
+    does not apply, as the threads share the memory of the server.
+    """
+
+    def __init__(self, workers: int | None = None,
+                 memory_limit: int | None = None):
+        self.executor = ThreadPoolExecutor(max_workers=workers,
+                                           thread_name_prefix="dc3-task")
+
+    def imap_unordered(self, func: Callable[[Any], Any],
+                       iterable: Iterable) -> Iterator:
+        futures = [self.executor.submit(func, x) for x in iterable]
+        try:
+            for future in as_completed(futures):
+                yield future.result()
+        finally:
+            # Do not keep the pool busy once the results are not awaited
+            for future in futures:
+                future.cancel()
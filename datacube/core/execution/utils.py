@@ -0,0 +1,48 @@
+from os.path import join
+from pathlib import Path
+from threading import Lock
+
+from envyaml import EnvYAML
+
+from datacube.core.execution.drivers.abstract import AbstractExecutor
+from datacube.core.execution.drivers.dask_cluster import DaskExecutor
+from datacube.core.execution.drivers.mr4mp_pool import Mr4mpExecutor
+from datacube.core.execution.drivers.process_pool import ProcessExecutor
+from datacube.core.execution.drivers.thread_pool import ThreadExecutor
+
+ROOT_PATH = str(Path(__file__).parent.parent.parent.parent)
+EXECUTION = EnvYAML(join(ROOT_PATH, "configs/app.conf.yml")) \
+    .get("execution", None) or {}
+
+DEFAULT_BACKEND = "mr4mp"
+
+_EXECUTOR: AbstractExecutor = None
+_EXECUTOR_LOCK = Lock()
+
+
+def create_executor(backend: str) -> AbstractExecutor:
+    workers = EXECUTION.get("workers")
+    memory_limit = EXECUTION.get("memory_limit")
+    if backend == "mr4mp":
+        return Mr4mpExecutor(workers, memory_limit)
+    if backend == "processes":
+        return ProcessExecutor(workers, memory_limit)
+    if backend == "threads":
+        return ThreadExecutor(workers, memory_limit)
+    if backend == "dask":
+        return DaskExecutor(workers, memory_limit,
+                            EXECUTION.get("scheduler_address"))
+    raise NotImplementedError(f"Execution backend '{backend}' not implemented")
+
+
+def get_executor() -> AbstractExecutor:
+    """
+    Returns the executor of the configured backend,
+    created on first use and then shared by all the builds.
+    """
+    global _EXECUTOR
+    with _EXECUTOR_LOCK:
+        if _EXECUTOR is None:
+            _EXECUTOR = create_executor(
+                EXECUTION.get("backend") or DEFAULT_BACKEND)
+        return _EXECUTOR
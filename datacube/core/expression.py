@@ -0,0 +1,270 @@
+import ast
+import functools
+import math
+import operator
+import re
+
+import attrs
+import numpy as np
+import xarray as xr
+
+from datacube.core.models.exception import BadRequest
+
+BINARY_OPERATORS = {
+    ast.Add: operator.add,
+    ast.Sub: operator.sub,
+    ast.Mult: operator.mul,
+    ast.Div: operator.truediv,
+    ast.FloorDiv: operator.floordiv,
+    ast.Mod: operator.mod,
+    ast.Pow: operator.pow,
+    ast.BitAnd: operator.and_,
+    ast.BitOr: operator.or_
+}
+UNARY_OPERATORS = {
+    ast.USub: operator.neg,
+    ast.UAdd: operator.pos,
+    ast.Invert: operator.invert
+}
+COMPARISONS = {
+    ast.Lt: operator.lt,
+    ast.LtE: operator.le,
+    ast.Gt: operator.gt,
+    ast.GtE: operator.ge,
+    ast.Eq: operator.eq,
+    ast.NotEq: operator.ne
+}
+# Bitwise operators, which only apply to integers
+BITWISE_OPERATORS = (ast.BitAnd, ast.BitOr, ast.Invert)
+# Functions and their number of arguments
+FUNCTIONS = {
+    "abs": (np.abs, 1),
+    "sqrt": (np.sqrt, 1),
+    "exp": (np.exp, 1),
+    "log": (np.log, 1),
+    "log10": (np.log10, 1),
+    "minimum": (np.minimum, 2),
+    "maximum": (np.maximum, 2),
+    "where": (xr.where, 3)
+}
+# Prefix of the names standing for the product bands in the parsed
+# expressions, followed by the hexadecimal encoding of the product band
+PRODUCT_BAND_PREFIX = "__product_band_"
+# Largest magnitude of the constants computed when compiling an expression
+MAX_CONSTANT = 1e308
+
+
+@attrs.frozen
+class BandExpression:
+    """
+    Expression of a band, parsed once and checked against a whitelist of
+    operations: arithmetic and comparisons between product bands
+    (ie 'S2.B08') and numbers, and the functions of FUNCTIONS. The
+    operations between numbers are computed once, when parsed.
+    """
+    expression: str
+    tree: ast.expr
+    product_bands: frozenset[str]
+
+    def product_bands_of(self, alias: str) -> set[str]:
+        """
+        Returns the bands of the product designated by 'alias'
+        that the expression references.
+        """
+        return {product_band.split(".", 1)[1]
+                for product_band in self.product_bands
+                if product_band.split(".", 1)[0] == alias}
+
+    @property
+    def aliases(self) -> set[str]:
+        """
+        Returns the aliases of the products that the expression references.
+        """
+        return {product_band.split(".", 1)[0]
+                for product_band in self.product_bands}
+
+    def evaluate(self, datacube: xr.Dataset,
+                 cache: dict[str, xr.DataArray]) -> xr.DataArray:
+        """
+        Computes the band from the product bands of the datacube.
+        The subterms computed are kept in 'cache', to be shared with
+        the other bands evaluated with it.
+        """
+        return self.__evaluate(self.tree, datacube, cache)
+
+    def __evaluate(self, node: ast.expr, datacube: xr.Dataset,
+                   cache: dict[str, xr.DataArray]):
+        if isinstance(node, ast.Constant):
+            return node.value
+
+        key = ast.dump(node)
+        if key in cache:
+            return cache[key]
+
+        def evaluate(n):
+            return self.__evaluate(n, datacube, cache)
+
+        if isinstance(node, ast.Name):
+            result = datacube[_product_band(node.id)]
+        elif isinstance(node, ast.BinOp):
+            result = BINARY_OPERATORS[type(node.op)](
+                evaluate(node.left), evaluate(node.right))
+        elif isinstance(node, ast.UnaryOp):
+            result = UNARY_OPERATORS[type(node.op)](evaluate(node.operand))
+        elif isinstance(node, ast.Compare):
+            result = COMPARISONS[type(node.ops[0])](
+                evaluate(node.left), evaluate(node.comparators[0]))
+        else:
+            result = FUNCTIONS[node.func.id][0](
+                *[evaluate(arg) for arg in node.args])
+
+        cache[key] = result
+        return result
+
+
+def _placeholder(product_band: str) -> str:
+    return PRODUCT_BAND_PREFIX + product_band.encode().hex()
+
+
+def _product_band(placeholder: str) -> str:
+    return bytes.fromhex(placeholder[len(PRODUCT_BAND_PREFIX):]).decode()
+
+
+def _unparse(node: ast.expr) -> str:
+    """
+    Returns the text of the node, with its product bands.
+    """
+    return re.sub(rf"{PRODUCT_BAND_PREFIX}[0-9a-f]*",
+                  lambda match: _product_band(match.group(0)),
+                  ast.unparse(node))
+
+
+def _replace_product_bands(expression: str,
+                           aliases: tuple[str, ...]) -> tuple[str, set[str]]:
+    """
+    Replaces the product bands of the expression by names that can be
+    parsed, as aliases may not be identifiers (ie 'S2-L2A.B08').
+    Returns the expression and its names standing for product bands.
+    """
+    if not aliases:
+        return expression, set()
+    names = set()
+
+    def replace(match: re.Match) -> str:
+        names.add(_placeholder(match.group(0)))
+        return _placeholder(match.group(0))
+
+    pattern = "|".join(re.escape(alias)
+                       for alias in sorted(aliases, key=len, reverse=True))
+    return re.sub(rf"(?<![\w.])(?:{pattern})\.[A-Za-z0-9_]+",
+                  replace, expression), names
+
+
+def _fold(operation, *operands):
+    """
+    Computes an operation between numbers, raising a ValueError
+    if its result is not a number or is too large.
+    """
+    if operation is operator.pow and \
+            all(isinstance(operand, int) for operand in operands):
+        base, exponent = operands
+        # The exact power of integers could take forever to compute
+        if abs(base) > 1 and exponent > 0 and \
+                exponent * math.log10(abs(base)) > math.log10(MAX_CONSTANT):
+            raise ValueError(f"{base} ** {exponent} is too large")
+    try:
+        value = operation(*operands)
+    except OverflowError:
+        raise ValueError("the result of an operation is too large")
+    except (ArithmeticError, TypeError) as e:
+        raise ValueError(str(e))
+    if not isinstance(value, (int, float)):
+        raise ValueError(f"'{value}' is not a number")
+    if abs(value) > MAX_CONSTANT:
+        raise ValueError(f"{value:.3g} is too large")
+    return value
+
+
+def _check_node(node: ast.expr, names: set[str],
+                product_bands: set[str]) -> ast.expr:
+    """
+    Checks that the node only uses whitelisted operations, collecting
+    the product bands it references. Returns the node, computed if it
+    is an operation between numbers.
+    """
+    def check(n):
+        return _check_node(n, names, product_bands)
+
+    def constant(*nodes):
+        return all(isinstance(n, ast.Constant) for n in nodes)
+
+    def check_bitwise(op, *nodes):
+        if isinstance(op, BITWISE_OPERATORS) and \
+                any(isinstance(n, ast.Constant) and
+                    isinstance(n.value, float) for n in nodes):
+            raise ValueError(f"'{_unparse(node)}' applies a bitwise " +
+                             "operator to a float")
+
+    if isinstance(node, ast.Constant):
+        if isinstance(node.value, bool) or \
+                not isinstance(node.value, (int, float)):
+            raise ValueError(f"'{node.value}' is not a number")
+    elif isinstance(node, ast.Name) and node.id in names:
+        product_bands.add(_product_band(node.id))
+    elif isinstance(node, ast.BinOp) and \
+            type(node.op) in BINARY_OPERATORS:
+        node.left, node.right = check(node.left), check(node.right)
+        check_bitwise(node.op, node.left, node.right)
+        if constant(node.left, node.right):
+            return ast.Constant(_fold(BINARY_OPERATORS[type(node.op)],
+                                      node.left.value, node.right.value))
+    elif isinstance(node, ast.UnaryOp) and \
+            type(node.op) in UNARY_OPERATORS:
+        node.operand = check(node.operand)
+        check_bitwise(node.op, node.operand)
+        if constant(node.operand):
+            return ast.Constant(_fold(UNARY_OPERATORS[type(node.op)],
+                                      node.operand.value))
+    elif isinstance(node, ast.Compare) and len(node.ops) == 1 and \
+            type(node.ops[0]) in COMPARISONS:
+        node.left = check(node.left)
+        node.comparators = [check(node.comparators[0])]
+        if constant(node.left, *node.comparators):
+            return ast.Constant(_fold(COMPARISONS[type(node.ops[0])],
+                                      node.left.value,
+                                      node.comparators[0].value))
+    elif isinstance(node, ast.Call) and isinstance(node.func, ast.Name) \
+            and node.func.id in FUNCTIONS and not node.keywords:
+        arity = FUNCTIONS[node.func.id][1]
+        if len(node.args) != arity:
+            raise ValueError(f"'{node.func.id}' takes {arity} " +
+                             f"argument{'s' if arity > 1 else ''}, " +
+                             f"not {len(node.args)}")
+        node.args = [check(arg) for arg in node.args]
+    elif isinstance(node, (ast.Name, ast.Attribute)):
+        raise ValueError(f"'{_unparse(node)}' is not a band of an " +
+                         "aliased product")
+    else:
+        raise ValueError(f"'{_unparse(node)}' is not supported")
+    return node
+
+
+@functools.lru_cache(maxsize=256)
+def compile_expression(expression: str,
+                       aliases: tuple[str, ...]) -> BandExpression:
+    """
+    Parses the expression of a band whose products are designated
+    by 'aliases', raising a BadRequest if it is not valid.
+    """
+    try:
+        parsed, names = _replace_product_bands(expression.strip(), aliases)
+        product_bands = set()
+        tree = _check_node(ast.parse(parsed, mode="eval").body, names,
+                           product_bands)
+        if not product_bands:
+            raise ValueError("it references no band of an aliased product")
+    except (SyntaxError, ValueError) as e:
+        raise BadRequest(title="Invalid band expression",
+                         detail=f"{expression}: {e.args[0]}")
+    return BandExpression(expression=expression, tree=tree,
+                          product_bands=frozenset(product_bands))
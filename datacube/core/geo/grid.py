@@ -0,0 +1,58 @@
+import math
+
+import attrs
+import numpy as np
+from pyproj import CRS
+from rasterio.transform import Affine, from_origin
+from shapely.geometry import Polygon
+
+from datacube.core.geo.utils import EARTH_RADIUS
+
+
+@attrs.define
+class CubeGrid:
+    """
+    Regular grid of the datacube, described by the ascending coordinates
+    of the centers of its pixels.
+    """
+    x: np.ndarray
+    y: np.ndarray
+    step: float
+
+    @classmethod
+    def from_roi(cls, roi: Polygon, resolution: float,
+                 crs: str) -> "CubeGrid":
+        """
+        Creates the grid covering the ROI, expressed in the projection 'crs',
+        with pixels of 'resolution' meters.
+        """
+        step = resolution
+        # Approximate the resolution in degrees for geographic projections
+        if CRS.from_user_input(crs).is_geographic:
+            step = resolution / (EARTH_RADIUS * math.pi / 180)
+
+        xmin, ymin, xmax, ymax = roi.bounds
+        return cls(x=np.arange(xmin + step / 2, xmax, step),
+                   y=np.arange(ymin + step / 2, ymax, step),
+                   step=step)
+
+    def window(self, bounds: tuple[float, float, float, float]) \
+            -> tuple[slice, slice]:
+        """
+        Returns the slices of the grid's x and y coordinates whose pixels
+        intersect the bounds (xmin, ymin, xmax, ymax).
+        """
+        x_start = np.searchsorted(self.x, bounds[0] - self.step / 2, "right")
+        x_end = np.searchsorted(self.x, bounds[2] + self.step / 2, "left")
+        y_start = np.searchsorted(self.y, bounds[1] - self.step / 2, "right")
+        y_end = np.searchsorted(self.y, bounds[3] + self.step / 2, "left")
+        return slice(x_start, x_end), slice(y_start, y_end)
+
+    def transform(self, x_slice: slice, y_slice: slice) -> Affine:
+        """
+        Returns the transform of the part of the grid delimited by the slices,
+        for arrays whose first row is the northernmost one.
+        """
+        return from_origin(self.x[x_slice][0] - self.step / 2,
+                           self.y[y_slice][-1] + self.step / 2,
+                           self.step, self.step)
@@ -1,51 +1,71 @@
-import enum
+import math
 
 import numpy as np
 import xarray as xr
 
 from datacube.core.models.enums import ChunkingStrategy as CStrat
 
+# Target size of a chunk in bytes
+DEFAULT_CHUNK_BYTES = 8 * 1024 ** 2
+# Ratio between the spatial and temporal sides of 'potato' chunks
+POTATO_RATIO = 8
+# Smallest spatial side of 'carrot' chunks
+CARROT_SIDE = 32
 
-class IntersectionType(enum.Enum):
-    LEFT = "left"
-    BOTTOM = "bottom"
-    RIGHT = "right"
-    TOP = "top"
-    SAME = "same"
 
-
-POTATO_CHUNK = {"x": 256, "y": 256, "t": 32}
-CARROT_CHUNK = {"x": 32, "y": 32, "t": 1024}
-SPINACH_CHUNK = {"x": 1024, "y": 1024, "t": 1}
+def _even_chunk(dim: int, chunk: int) -> int:
+    """
+    Shrinks the chunk so that the dimension is split in as many chunks,
+    but of even sizes, avoiding a small partial chunk at the edge.
+    """
+    chunk = max(1, min(chunk, dim))
+    return math.ceil(dim / math.ceil(dim / chunk))
 
 
 def get_chunk_shape(dims: dict[str, int],
-                    chunking_strat: CStrat = CStrat.POTATO) -> dict[str, int]:
+                    chunking_strat: CStrat = CStrat.POTATO,
+                    itemsize: int = 4,
+                    chunk_bytes: int = DEFAULT_CHUNK_BYTES) -> dict[str, int]:
     """
-    Generates chunks of pre-determined size based on a desired strategy.
-    For 'uint32' and 'int32' data types, they result in ~8Mb chunks.
+    Generates chunks of at most 'chunk_bytes' for values of 'itemsize'
+    bytes, shaped after a desired strategy: 'spinach' chunks are a single
+    time slice, 'carrot' chunks are as deep in time as possible and
+    'potato' chunks are balanced. Dimensions smaller than the chunks leave
+    room for the others.
     """
-
-    def resize_time_depth(chunk_shape: dict[str, int], dims: dict[str, int]):
-        while dims["t"] <= chunk_shape["t"] / 4:
-            chunk_shape["x"] *= 2
-            chunk_shape["y"] *= 2
-            chunk_shape["t"] = int(chunk_shape["t"]/4)
-        return chunk_shape
+    elements = max(1, chunk_bytes // itemsize)
 
     if chunking_strat == CStrat.POTATO:
-        chunk_shape = resize_time_depth(POTATO_CHUNK, dims)
+        t = round((elements / POTATO_RATIO ** 2) ** (1 / 3))
     elif chunking_strat == CStrat.CARROT:
-        chunk_shape = resize_time_depth(CARROT_CHUNK, dims)
+        t = elements // CARROT_SIDE ** 2
     elif chunking_strat == CStrat.SPINACH:
-        chunk_shape = SPINACH_CHUNK
+        t = 1
     else:
         raise ValueError(f"Chunking strategy '{chunking_strat}' not defined")
+    t = max(1, min(t, dims["t"]))
+
+    # Share the remaining elements between x and y
+    plane = max(1, elements // t)
+    side = math.isqrt(plane)
+    if dims["x"] < side:
+        x, y = dims["x"], plane // dims["x"]
+    elif dims["y"] < side:
+        x, y = plane // dims["y"], dims["y"]
+    else:
+        x, y = side, side
+
+    return {"x": _even_chunk(dims["x"], x),
+            "y": _even_chunk(dims["y"], y),
+            "t": _even_chunk(dims["t"], t)}
 
-    chunk_shape["x"] = min(chunk_shape["x"], dims["x"])
-    chunk_shape["y"] = min(chunk_shape["y"], dims["y"])
-    chunk_shape["t"] = min(chunk_shape["t"], dims["t"])
-    return chunk_shape
+
+def get_itemsize(ds: xr.Dataset) -> int:
+    """
+    Returns the size in bytes of the largest values of the dataset's bands.
+    """
+    return max([band.dtype.itemsize for band in ds.data_vars.values()],
+               default=4)
 
 
 def get_bounds(ds: xr.Dataset):
@@ -55,149 +75,95 @@ def get_bounds(ds: xr.Dataset):
             float(ds.get("y").max()))
 
 
-def intersect(first_dataset: xr.Dataset,
-              second_dataset: xr.Dataset) -> list[IntersectionType]:
-    first_bounds = get_bounds(first_dataset)
-    second_bounds = get_bounds(second_dataset)
-
-    if first_bounds == second_bounds:
-        return [IntersectionType.SAME]
-
-    intersections = []
-    if first_bounds[0] < second_bounds[2] < first_bounds[2]:
-        intersections.append(IntersectionType.LEFT)
-    if first_bounds[1] < second_bounds[3] < first_bounds[3]:
-        intersections.append(IntersectionType.BOTTOM)
-    if first_bounds[0] < second_bounds[0] < first_bounds[2]:
-        intersections.append(IntersectionType.RIGHT)
-    if first_bounds[1] < second_bounds[1] < first_bounds[3]:
-        intersections.append(IntersectionType.TOP)
-
-    return np.array(intersections)
+def _on_grid(coords: np.ndarray, grid_coords: np.ndarray) -> bool:
+    """
+    Whether the coordinates are the same as those of the grid,
+    up to a fraction of the grid's step.
+    """
+    if len(coords) != len(grid_coords):
+        return False
+    if len(grid_coords) < 2:
+        return True
+    tolerance = abs(grid_coords[1] - grid_coords[0]) / 100
+    return bool(np.all(np.abs(coords - grid_coords) <= tolerance))
 
 
-def merge_datasets(first_dataset: xr.Dataset,
-                   second_dataset: xr.Dataset) -> xr.Dataset:
+class GridMosaic:
     """
-    Merge two datasets based on their geographical bounds as well as
-    their bands. Performs a mosaicking for the bands in common, while just
-    appending the other bands to the resulting dataset.
+    Mosaic of datasets on a regular grid. Each dataset is pasted at its
+    offset in preallocated arrays, and for every pixel the most recent
+    product ('product_timestamp' attribute) with data is kept.
+
+    The product kept for each pixel is shared by the bands, whose products
+    are expected to share their footprint: it is the index of the product
+    in the timestamps of the products pasted, 0 for no product.
     """
 
-    if first_dataset is None:
-        return second_dataset
-    if second_dataset is None:
-        return first_dataset
-
-    # It is only possible to concatenate datasets that contain the same bands
-    common_bands = []
-    for band in first_dataset.data_vars.keys():
-        if band in second_dataset.data_vars.keys():
-            common_bands.append(band)
-
-    # If they intersect in any way but don't hold the same data,
-    # then no mosaickin is needed
-    if len(common_bands) == 0:
-        return xr.merge(
-            (first_dataset, second_dataset), combine_attrs="override")
-
-    rest_first_ds = first_dataset[
-        list(set(first_dataset.data_vars.keys()).difference(common_bands))]
-    common_first_ds = first_dataset[common_bands]
-
-    rest_second_ds = second_dataset[
-        list(set(second_dataset.data_vars.keys()).difference(common_bands))]
-    commonSecondDS = second_dataset[common_bands]
-
-    return xr.merge(
-        (_mosaicking(common_first_ds, commonSecondDS),
-         rest_first_ds, rest_second_ds), combine_attrs="override")
-
-
-def _mosaicking(first_dataset: xr.Dataset,
-                second_dataset: xr.Dataset) -> xr.Dataset:
-
-    intersection_types = intersect(first_dataset, second_dataset)
-
-    # If no intersections, auto-magically combine
-    if len(intersection_types) == 0:
-        return xr.combine_by_coords(
-            (first_dataset, second_dataset), combine_attrs="override")
-
-    # If they represent the same extent of data, merge based on criterion
-    if IntersectionType.SAME in intersection_types:
-        if first_dataset.attrs["product_timestamp"] \
-                >= second_dataset.attrs["product_timestamp"]:
-            ds = first_dataset.combine_first(second_dataset) \
-                    .assign_attrs({"product_timestamp":
-                                   first_dataset.attrs["product_timestamp"]})
-            return ds
+    def __init__(self, x: np.ndarray, y: np.ndarray):
+        self.x = np.asarray(x)
+        self.y = np.asarray(y)
+        self.t: np.ndarray = None
+        self.attrs = {}
+        self.bands: dict[str, np.ndarray] = {}
+        self.priorities: np.ndarray = None
+        self.timestamps: list[float] = [-np.inf]
+
+    def paste(self, dataset: xr.Dataset):
+        """
+        Pastes the dataset on the pixels of the grid that it covers.
+        """
+        bounds = get_bounds(dataset)
+        x_start = np.searchsorted(self.x, bounds[0], side="left")
+        x_end = np.searchsorted(self.x, bounds[2], side="right")
+        y_start = np.searchsorted(self.y, bounds[1], side="left")
+        y_end = np.searchsorted(self.y, bounds[3], side="right")
+        if x_start == x_end or y_start == y_end:
+            return
+
+        timestamp = dataset.attrs.get("product_timestamp", -np.inf)
+        if self.t is None:
+            self.t = dataset.get("t").values
+        if not self.attrs or timestamp > self.attrs.get(
+                "product_timestamp", -np.inf):
+            self.attrs = dict(dataset.attrs)
+
+        # Datasets already on the grid are pasted without interpolation
+        if _on_grid(dataset.get("x").values, self.x[x_start:x_end]) \
+                and _on_grid(dataset.get("y").values, self.y[y_start:y_end]):
+            granule = dataset
         else:
-            ds = second_dataset.combine_first(first_dataset) \
-                    .assign_attrs({"product_timestamp":
-                                   second_dataset.attrs["product_timestamp"]})
-            return ds
-
-    first_bounds = get_bounds(first_dataset)
-    second_bounds = get_bounds(second_dataset)
-
-    # Resolve overlapping counter-clockwise
-    if IntersectionType.LEFT in intersection_types:
-        left = second_dataset.where(
-            second_dataset.x < first_bounds[0], drop=True)
-        first_ds_intersection = first_dataset.where(
-            first_dataset.x <= second_bounds[2], drop=True)
-        second_ds_intersection = second_dataset.where(
-            second_dataset.x >= first_bounds[0], drop=True)
-        intersection = _mosaicking(first_ds_intersection,
-                                   second_ds_intersection)
-        right = first_dataset.where(
-            first_dataset.x > second_bounds[2], drop=True)
-        if len(left.x) == 0:
-            return xr.concat([intersection, right], dim="x")
-        return xr.concat([left, intersection, right], dim="x")
-
-    if IntersectionType.BOTTOM in intersection_types:
-        bottom = second_dataset.where(
-            second_dataset.y < first_bounds[1], drop=True)
-        first_ds_intersection = first_dataset.where(
-            first_dataset.y <= second_bounds[3], drop=True)
-        second_ds_intersection = second_dataset.where(
-            second_dataset.y >= first_bounds[1], drop=True)
-        intersection = _mosaicking(first_ds_intersection,
-                                   second_ds_intersection)
-        top = first_dataset.where(
-            first_dataset.y > second_bounds[3], drop=True)
-        if len(bottom.y) == 0:
-            return xr.concat([intersection, top], dim="y")
-        return xr.concat([bottom, intersection, top], dim="y")
-
-    if IntersectionType.RIGHT in intersection_types:
-        left = first_dataset.where(
-            first_dataset.x < second_bounds[0], drop=True)
-        first_ds_intersection = first_dataset.where(
-            first_dataset.x >= second_bounds[0], drop=True)
-        second_ds_intersection = second_dataset.where(
-            second_dataset.x <= first_bounds[2], drop=True)
-        intersection = _mosaicking(first_ds_intersection,
-                                   second_ds_intersection)
-        right = second_dataset.where(
-            second_dataset.x > first_bounds[2], drop=True)
-        if len(right.x) == 0:
-            return xr.concat([left, intersection], dim="x")
-        return xr.concat([left, intersection, right], dim="x")
-
-    if IntersectionType.TOP in intersection_types:
-        bottom = first_dataset.where(
-            first_dataset.y < second_bounds[1], drop=True)
-        first_ds_intersection = first_dataset.where(
-            first_dataset.y >= second_bounds[1], drop=True)
-        second_ds_intersection = second_dataset.where(
-            second_dataset.y <= first_bounds[3], drop=True)
-        intersection = _mosaicking(first_ds_intersection,
-                                   second_ds_intersection)
-        top = second_dataset.where(
-            second_dataset.y > first_bounds[3], drop=True)
-        if len(top.y) == 0:
-            return xr.concat([bottom, intersection], dim="y")
-        return xr.concat([bottom, intersection, top], dim="y")
+            granule = dataset.interp(x=self.x[x_start:x_end],
+                                     y=self.y[y_start:y_end],
+                                     method="nearest")
+        bands = {band: data_array.transpose("x", "y", "t").values
+                 for band, data_array in granule.data_vars.items()}
+        if not bands:
+            return
+        if self.priorities is None:
+            shape = (len(self.x), len(self.y),
+                     next(iter(bands.values())).shape[2])
+            self.priorities = np.zeros(shape, dtype=np.int32)
+        priority = self.priorities[x_start:x_end, y_start:y_end]
+
+        # Pixels are replaced only by data from a more recent product
+        has_data = np.zeros(priority.shape, dtype=bool)
+        for values in bands.values():
+            has_data |= ~np.isnan(values)
+        paste = has_data & (timestamp > np.asarray(self.timestamps)[priority])
+        for band, values in bands.items():
+            if band not in self.bands:
+                self.bands[band] = np.full(
+                    self.priorities.shape, np.nan,
+                    dtype=np.promote_types(values.dtype, np.float32))
+            mosaic = self.bands[band][x_start:x_end, y_start:y_end]
+            band_paste = paste & ~np.isnan(values)
+            mosaic[band_paste] = values[band_paste]
+        self.timestamps.append(timestamp)
+        priority[paste] = len(self.timestamps) - 1
+
+    def to_dataset(self) -> xr.Dataset:
+        return xr.Dataset(
+            {band: (("x", "y", "t"), values)
+             for band, values in self.bands.items()},
+            coords={"x": self.x, "y": self.y, "t": self.t},
+            attrs=self.attrs)
@@ -1,11 +1,12 @@
 import math
-import re
 from datetime import datetime
 
+import numpy as np
 import xarray as xr
 from shapely.geometry import Polygon
 
 from datacube.core.cache.cache_manager import CacheManager
+from datacube.core.expression import compile_expression
 from datacube.core.geo.utils import bbox2polygon, project_polygon
 from datacube.core.models.enums import RGB
 from datacube.core.models.metadata import (DatacubeMetadata, DimensionType,
@@ -40,18 +41,7 @@ def create_datacube_metadata(request: ExtendedCubeBuildRequest,
         step=y_step, reference_system=request.target_projection
     )
 
-    t_step = None
-    if len(datacube.get("t")) != 1:
-        t_step = str(datacube.get("t").diff("t").sum().values
-                     / (len(datacube.get("t")) - 1))
-    dimensions["t"] = TemporalDimension(
-        type=DimensionType.TEMPORAL, axis="t", description="",
-        extent=[datetime.utcfromtimestamp(
-                    datacube.get("t").values[0]).isoformat() + 'Z',
-                datetime.utcfromtimestamp(
-                    datacube.get("t").values[-1]).isoformat() + 'Z'],
-        step=t_step
-    )
+    dimensions["t"] = compute_temporal_dimension(datacube)
 
     variables = {}
     for band in request.bands:
@@ -60,7 +50,8 @@ def create_datacube_metadata(request: ExtendedCubeBuildRequest,
             type="data", description=band.description,
             extent=[datacube.get(band.name).min().values.tolist(),
                     datacube.get(band.name).max().values.tolist()],
-            unit=band.unit, expression=band.expression
+            unit=band.unit, expression=band.expression,
+            **{"dc3:compression": band.compression}
         )
 
     # If all colors have been assigned, use them for the preview
@@ -80,7 +71,9 @@ def create_datacube_metadata(request: ExtendedCubeBuildRequest,
     for chunks in datacube.chunks.values():
         number_of_chunks *= len(chunks)
 
-    data_weight = list(datacube.variables.values())[0].data.dtype.itemsize
+    # Weight of the values of the bands as they are stored
+    data_weight = max(band.stored_dtype(datacube.get(band.name).dtype)
+                      .itemsize for band in request.bands)
     chunk_weight = datacube.chunks['x'][0] * datacube.chunks['y'][0] \
         * datacube.chunks['t'][0] * data_weight
 
@@ -92,7 +85,7 @@ def create_datacube_metadata(request: ExtendedCubeBuildRequest,
     for group in request.composition:
         group_composition: dict[str, list[CachedAbstractRasterArchive]] = {}
         for r in group.rasters:
-            raster = CacheManager.get(r.path)
+            raster = CacheManager.get(request.datacube_path, r.path)
             if raster:
                 # Split the rasters by timestamp and product type
                 if raster.type.to_key() in group_composition:
@@ -163,9 +156,10 @@ def create_datacube_metadata(request: ExtendedCubeBuildRequest,
 
     band_indicators: dict[str, QualityIndicators] = {}
     for band in request.bands:
-        # Find which product types constitute the band
-        aliases_in_band = re.findall(r'([a-zA-Z0-9]*)\.[a-zA-Z0-9]*',
-                                     band.expression)
+        # Find which product types constitute the band, each counted once
+        aliases_in_band = compile_expression(
+            band.expression,
+            tuple(alias.alias for alias in request.aliases)).aliases
         types_in_band = []
         for alias in aliases_in_band:
             for type in request.aliases:
@@ -214,9 +208,93 @@ def create_datacube_metadata(request: ExtendedCubeBuildRequest,
         "dc3:preview": preview,
         "dc3:number_of_chunks": number_of_chunks,
         "dc3:chunk_weight": chunk_weight,
+        "dc3:chunking_strategy": request.chunking_strategy,
         "dc3:fill_ratio": fill_ratio})
 
 
+def update_datacube_metadata(request: ExtendedCubeBuildRequest,
+                             datacube: xr.Dataset,
+                             metadata: DatacubeMetadata,
+                             x_step: float | int | None,
+                             y_step: float | int | None) -> DatacubeMetadata:
+    """
+    Updates the metadata of a datacube to which the groups of the request
+    have been appended.
+
+    The quality indicators of the cube and of its bands being products over
+    its groups, they are multiplied by those of the new groups. The time
+    compacity of the new groups is relative to their own timespan.
+    """
+    band_attrs = {band.name: dict(datacube.get(band.name).attrs)
+                  for band in request.bands}
+    new_slices = datacube.sel(
+        t=sorted({group.timestamp for group in request.composition}))
+    update = create_datacube_metadata(request, new_slices, x_step, y_step)
+
+    for band in request.bands:
+        new_band_attrs = new_slices.get(band.name).attrs
+        for indicator in QualityIndicators.__fields__:
+            band_attrs[band.name][indicator] = \
+                band_attrs[band.name].get(indicator, 1) \
+                * new_band_attrs[indicator]
+        datacube.get(band.name).attrs = band_attrs[band.name]
+
+    dimensions = metadata.dimensions
+    dimensions["t"] = compute_temporal_dimension(datacube)
+
+    variables = metadata.variables
+    for name, variable in variables.items():
+        extent = variable.extent + update.variables[name].extent
+        variable.extent = [float(np.nanmin(extent)), float(np.nanmax(extent))]
+
+    composition = metadata.composition + update.composition
+
+    number_of_chunks = 1
+    for chunks in datacube.chunks.values():
+        number_of_chunks *= len(chunks)
+
+    # The fill ratio is averaged over the time slices
+    new_t = len(new_slices.get("t"))
+    fill_ratio = (metadata.fill_ratio * (len(datacube.get("t")) - new_t)
+                  + update.fill_ratio * new_t) / len(datacube.get("t"))
+
+    return DatacubeMetadata(**{
+        "dc3:time_compacity": metadata.time_compacity
+        * update.time_compacity,
+        "dc3:spatial_coverage": metadata.spatial_coverage
+        * update.spatial_coverage,
+        "dc3:group_lightness": metadata.group_lightness
+        * update.group_lightness,
+        "dc3:time_regularity": compute_time_regularity(composition),
+        "cube:dimensions": dimensions,
+        "cube:variables": variables,
+        "dc3:composition": composition,
+        "dc3:preview": metadata.preview,
+        "dc3:number_of_chunks": number_of_chunks,
+        "dc3:chunk_weight": metadata.chunk_weight,
+        "dc3:chunking_strategy": metadata.chunking_strategy,
+        "dc3:fill_ratio": fill_ratio})
+
+
+def compute_temporal_dimension(datacube: xr.Dataset) -> TemporalDimension:
+    """
+    Describes the time dimension of the datacube, its step being
+    the average time between two slices.
+    """
+    t_step = None
+    if len(datacube.get("t")) != 1:
+        t_step = str(datacube.get("t").diff("t").sum().values
+                     / (len(datacube.get("t")) - 1))
+    return TemporalDimension(
+        type=DimensionType.TEMPORAL, axis="t", description="",
+        extent=[datetime.utcfromtimestamp(
+                    datacube.get("t").values[0]).isoformat() + 'Z',
+                datetime.utcfromtimestamp(
+                    datacube.get("t").values[-1]).isoformat() + 'Z'],
+        step=t_step
+    )
+
+
 def compute_time_compacity(rasters: list[CachedAbstractRasterArchive],
                            timespan: int) -> float:
     """
@@ -273,7 +351,8 @@ def compute_group_lightness(rasters: list[CachedAbstractRasterArchive],
     return polygon_union.area / sum_areas
 
 
-def compute_time_regularity(composition: list[RasterGroup]) -> float:
+def compute_time_regularity(
+        composition: list[RasterGroup] | list[GroupMetadata]) -> float:
     """
     Computes an indicator of how regularly spaced
     the time slices of a datacube is.
@@ -0,0 +1,25 @@
+from pydantic import BaseModel, Field
+
+DIMENSIONS_DESCRIPTION = "Size of the datacube along each of its dimensions."
+CHUNK_SHAPE_DESCRIPTION = "Shape of the chunks of the bands of the datacube."
+NUMBER_OF_CHUNKS_DESCRIPTION = "Number of chunks of each band."
+OUTPUT_BYTES_DESCRIPTION = "Estimated size of the datacube in bytes, " + \
+                           "before compression."
+INPUT_BYTES_DESCRIPTION = "Size in bytes of the band files to download " + \
+                          "from the raster archives."
+GRANULES_PER_SLICE_DESCRIPTION = "Number of rasters mosaicked in each " + \
+                                 "time slice, by timestamp."
+SKIPPED_RASTERS_DESCRIPTION = "Rasters that don't intersect the ROI, " + \
+                              "and that are not downloaded."
+
+
+class CubeBuildEstimate(BaseModel):
+    dimensions: dict[str, int] = Field(description=DIMENSIONS_DESCRIPTION)
+    chunk_shape: dict[str, int] = Field(description=CHUNK_SHAPE_DESCRIPTION)
+    number_of_chunks: int = Field(description=NUMBER_OF_CHUNKS_DESCRIPTION)
+    output_bytes: int = Field(description=OUTPUT_BYTES_DESCRIPTION)
+    input_bytes: int = Field(description=INPUT_BYTES_DESCRIPTION)
+    granules_per_slice: dict[int, int] = Field(
+        description=GRANULES_PER_SLICE_DESCRIPTION)
+    skipped_rasters: list[str] = Field(
+        description=SKIPPED_RASTERS_DESCRIPTION)
@@ -4,9 +4,13 @@ PRODUCT_URL_DESCRIPTION = \
     "URL at which the product (datacube or pivot archive) is created"
 PREVIEW_URL_DESCRIPTION = "URL at which the datacube's preview is created."
 PREVIEW_DESCRIPTION = "The preview of the datacube encoded in base64"
+SKIPPED_RASTERS_DESCRIPTION = "Rasters of the composition that were " + \
+                              "skipped, as they don't intersect the ROI."
 
 
 class CubeBuildResult(BaseModel):
     product_url: str = Field(description=PRODUCT_URL_DESCRIPTION)
     preview_url: str = Field(description=PREVIEW_URL_DESCRIPTION)
     preview: str = Field(description=PREVIEW_DESCRIPTION)
+    skipped_rasters: list[str] | None = Field(
+        description=SKIPPED_RASTERS_DESCRIPTION)
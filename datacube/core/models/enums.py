@@ -18,3 +18,17 @@ class SensorFamily(str, enum.Enum):
     RADAR = "RADAR"
     MULTI = "MULTI"
     UNKNOWN = "UNKNOWN"
+
+
+class CompressionCodec(str, enum.Enum):
+    ZSTD = 'zstd'
+    LZ4 = 'lz4'
+    LZ4HC = 'lz4hc'
+    ZLIB = 'zlib'
+    BLOSCLZ = 'blosclz'
+
+
+class Shuffle(str, enum.Enum):
+    NOSHUFFLE = 'noshuffle'
+    SHUFFLE = 'shuffle'
+    BITSHUFFLE = 'bitshuffle'
@@ -17,6 +17,12 @@ class BadRequest(AbstractException):
     status: int = 400
 
 
+@attrs.define
+class TooManyRequests(AbstractException):
+    type: str = "too many requests"
+    status: int = 429
+
+
 @attrs.define
 class DownloadError(AbstractException):
     type: str = "raster download error"
@@ -3,6 +3,9 @@ from typing import Annotated, Any, Literal
 
 from pydantic import BaseModel, Field
 
+from datacube.core.models.enums import ChunkingStrategy as CStrat
+from datacube.core.models.request.compression import Compression
+
 
 class DimensionType(str, enum.Enum):
     SPATIAL = "spatial"
@@ -37,6 +40,7 @@ class Variable(BaseModel):
     extent: list[float | int | str] = Field()
     unit: str | None = Field()
     expression: str = Field()
+    compression: Compression | None = Field(alias="dc3:compression")
 
 
 class QualityIndicators(BaseModel):
@@ -61,4 +65,5 @@ class DatacubeMetadata(QualityIndicatorsCube):
     preview: dict[str, str] = Field(alias="dc3:preview")
     number_of_chunks: int = Field(alias="dc3:number_of_chunks")
     chunk_weight: int = Field(alias="dc3:chunk_weight")
+    chunking_strategy: CStrat | None = Field(alias="dc3:chunking_strategy")
     fill_ratio: float = Field(alias="dc3:fill_ratio")
@@ -1,13 +1,17 @@
+import numpy as np
 from matplotlib import cm
 from pydantic import BaseModel, Field
 
 from datacube.core.models.enums import RGB
 from datacube.core.models.exception import BadRequest
+from datacube.core.models.request.compression import Compression
 
 NAME_DESCRIPTION = "The name of the band requested."
 EXPRESSION_DESCRIPTION = "The expression to create the desired band. " + \
     "Can be a band of the data prefaced by its alias (ie 'S2.B05', " + \
-    "'S2.B12') or an operation on the bands (ie 'S2.B5 + S2.B8')."
+    "'S2.B12') or an operation on the bands (ie 'S2.B5 + S2.B8'), " + \
+    "using arithmetic operators, comparisons and the functions abs, " + \
+    "sqrt, exp, log, log10, minimum, maximum and where."
 DESCRIPTION_DESCRIPTION = "A description of the requested band."
 UNIT_DESCRIPTION = "The unit of the requested band."
 MIN_DESCRIPTION = "A minimum value to clip the band values."
@@ -15,6 +19,15 @@ MAX_DESCRIPTION = "A maximum value to clip the band values."
 RGB_DESCRIPTION = "Which RGB channel the band is used for the preview. " + \
     "Value can be 'RED', 'GREEN' or 'BLUE'."
 CMAP_DESCRIPTION = "The matplotlib color map to use for the preview."
+DATA_TYPE_DESCRIPTION = "The integer data type in which to store the " + \
+    "band (ie 'uint16', 'int16'). Pixels without data are stored with " + \
+    "the largest value of unsigned types and the smallest value of " + \
+    "signed types. By default the band is stored as floats."
+SCALE_FACTOR_DESCRIPTION = "The scale factor of the values stored in " + \
+    "'data_type': value = stored value * scale_factor + add_offset."
+ADD_OFFSET_DESCRIPTION = "The offset of the values stored in 'data_type'."
+COMPRESSION_DESCRIPTION = "The compression of the band. By default, " + \
+    "the compression of the datacube."
 
 
 class Band(BaseModel):
@@ -27,8 +40,62 @@ class Band(BaseModel):
     max: float | None = Field(default=None, description=MAX_DESCRIPTION)
     rgb: RGB | None = Field(default=None, description=RGB_DESCRIPTION)
     cmap: str | None = Field(default=None, description=CMAP_DESCRIPTION)
+    data_type: str | None = Field(default=None,
+                                  description=DATA_TYPE_DESCRIPTION)
+    scale_factor: float | None = Field(default=None,
+                                       description=SCALE_FACTOR_DESCRIPTION)
+    add_offset: float | None = Field(default=None,
+                                     description=ADD_OFFSET_DESCRIPTION)
+    compression: Compression | None = Field(
+        default=None, description=COMPRESSION_DESCRIPTION)
 
     def check_visualistion(self):
         if self.cmap is not None and self.cmap not in cm._cmap_registry:
             raise BadRequest(f"Color map '{self.cmap}' does not exist " +
                              "in matplotlib's color map registry.")
+
+    def check_encoding(self):
+        if self.data_type is None:
+            if self.scale_factor is not None or self.add_offset is not None:
+                raise BadRequest(f"Band '{self.name}' can't have a scale " +
+                                 "factor or an offset without 'data_type'.")
+            return
+        try:
+            integer = np.issubdtype(np.dtype(self.data_type), np.integer)
+        except TypeError:
+            integer = False
+        if not integer:
+            raise BadRequest(f"Data type '{self.data_type}' of band " +
+                             f"'{self.name}' is not an integer type.")
+        if self.scale_factor == 0:
+            raise BadRequest(f"Scale factor of band '{self.name}' " +
+                             "can't be 0.")
+
+    def stored_dtype(self, dtype: np.dtype) -> np.dtype:
+        """
+        Returns the data type in which the band computed as 'dtype'
+        is stored.
+        """
+        return np.dtype(self.data_type) if self.data_type is not None \
+            else np.dtype(dtype)
+
+    def encoding(self, dtype: np.dtype) -> dict:
+        """
+        Returns the zarr encoding of the band computed as 'dtype', empty
+        if it is stored as is with the default compression.
+        """
+        encoding = {}
+        dtype = self.stored_dtype(dtype)
+        if self.data_type is not None:
+            encoding["dtype"] = dtype
+            encoding["_FillValue"] = np.iinfo(dtype).max \
+                if np.issubdtype(dtype, np.unsignedinteger) \
+                else np.iinfo(dtype).min
+            if self.scale_factor is not None:
+                encoding["scale_factor"] = self.scale_factor
+            if self.add_offset is not None:
+                encoding["add_offset"] = self.add_offset
+
+        if self.compression is not None:
+            encoding.update(self.compression.encoding(dtype))
+        return encoding
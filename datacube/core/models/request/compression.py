@@ -0,0 +1,47 @@
+import numpy as np
+from numcodecs import Blosc, Delta, Quantize
+from numcodecs.abc import Codec
+from pydantic import BaseModel, Field
+
+from datacube.core.models.enums import CompressionCodec, Shuffle
+
+CODEC_DESCRIPTION = "The Blosc compressor: 'zstd', 'lz4', 'lz4hc', " + \
+                    "'zlib' or 'blosclz'."
+LEVEL_DESCRIPTION = "The compression level, from 0 (no compression) to 9."
+SHUFFLE_DESCRIPTION = "The shuffle applied by Blosc before compressing: " + \
+                      "'noshuffle', 'shuffle' (byte) or 'bitshuffle'."
+DELTA_DESCRIPTION = "Whether to store the differences between " + \
+                    "consecutive values, efficient for smooth bands."
+QUANTIZE_DESCRIPTION = "Number of decimal digits kept for float bands. " + \
+                       "By default, float values are stored without loss."
+
+BLOSC_SHUFFLES = {Shuffle.NOSHUFFLE: Blosc.NOSHUFFLE,
+                  Shuffle.SHUFFLE: Blosc.SHUFFLE,
+                  Shuffle.BITSHUFFLE: Blosc.BITSHUFFLE}
+
+
+class Compression(BaseModel):
+    codec: CompressionCodec = Field(default=CompressionCodec.ZSTD,
+                                    description=CODEC_DESCRIPTION)
+    level: int = Field(default=5, description=LEVEL_DESCRIPTION, ge=0, le=9)
+    shuffle: Shuffle = Field(default=Shuffle.SHUFFLE,
+                             description=SHUFFLE_DESCRIPTION)
+    delta: bool = Field(default=False, description=DELTA_DESCRIPTION)
+    quantize: int | None = Field(default=None,
+                                 description=QUANTIZE_DESCRIPTION, gt=0)
+
+    def encoding(self, dtype: np.dtype) -> dict[str, Codec | list[Codec]]:
+        """
+        Returns the zarr compressor and filters of the values
+        stored with the data type 'dtype'.
+        """
+        filters = []
+        if self.quantize is not None and np.issubdtype(dtype, np.floating):
+            filters.append(Quantize(digits=self.quantize, dtype=dtype))
+        if self.delta:
+            filters.append(Delta(dtype=dtype))
+
+        return {"compressor": Blosc(cname=self.codec.value,
+                                    clevel=self.level,
+                                    shuffle=BLOSC_SHUFFLES[self.shuffle]),
+                "filters": filters or None}
@@ -4,15 +4,18 @@ import re
 from pydantic import BaseModel, Field
 from shapely.geometry import Polygon
 
+from datacube.core.expression import compile_expression
 from datacube.core.geo.utils import roi2geometry
 from datacube.core.models.enums import RGB
 from datacube.core.models.enums import ChunkingStrategy as CStrat
 from datacube.core.models.exception import BadRequest
 from datacube.core.models.request.band import Band
+from datacube.core.models.request.compression import Compression
 from datacube.core.models.request.rasterGroup import RasterGroup
 from datacube.core.models.request.rasterProductType import (AliasedRasterType,
                                                             RasterType)
-from datacube.core.storage.utils import get_local_root_directory
+from datacube.core.storage.utils import (get_local_root_directory,
+                                         get_output_compression)
 
 COMPOSITION_DESCRIPTION = "The composition is an array of raster groups " + \
                           "that each represent a temporal slice of " + \
@@ -38,6 +41,21 @@ CHUNKING_DESCRIPTION = "Defines how we want the datacube to be chunked, " + \
                        "while 'spinach' chunks data on wide geographical " + \
                        "areas. 'Potato' is a balanced option, creating " + \
                        "an equally sized chunk."
+TARGET_GRID_DESCRIPTION = "Whether to build the datacube on a grid " + \
+                          "computed from the ROI and the target " + \
+                          "resolution. The bands are then projected " + \
+                          "once, directly on this grid, and each time " + \
+                          "slice is mosaicked as soon as its rasters " + \
+                          "are ready. By default, the " + \
+                          "grid is the one of the product closest to " + \
+                          "the center of the ROI."
+COMPRESSION_DESCRIPTION = "The compression of the bands of the " + \
+                          "datacube. By default, the one configured " + \
+                          "for the output storage."
+UPDATE_DESCRIPTION = "Whether to append the raster groups of the " + \
+                     "composition to the existing datacube at " + \
+                     "'datacube_path', on its grid. Only the groups " + \
+                     "more recent than the datacube are built."
 DESCRIPTION_DESCRIPTION = "The datacube's description."
 THEMATICS_DESCRIPTION = "Thematics of the datacube."
 
@@ -54,6 +72,11 @@ class CubeBuildRequest(BaseModel):
                                    description=PROJECTION_DESCRIPTION)
     chunking_strategy: CStrat = Field(default=CStrat.POTATO,
                                       description=CHUNKING_DESCRIPTION)
+    target_grid: bool = Field(default=False,
+                              description=TARGET_GRID_DESCRIPTION)
+    compression: Compression | None = Field(
+        description=COMPRESSION_DESCRIPTION)
+    update: bool = Field(default=False, description=UPDATE_DESCRIPTION)
     description: str | None = Field(description=DESCRIPTION_DESCRIPTION)
     thematics: list[str] | None = Field(description=THEMATICS_DESCRIPTION)
 
@@ -63,8 +86,19 @@ class ExtendedCubeBuildRequest(CubeBuildRequest, arbitrary_types_allowed=True):
     rgb: dict[RGB, str] = Field(default={})
     pivot_format: bool | None = Field(
         description="Whether to put the datacube in pivot format")
+    reprojection_memory: int | None = Field(
+        description="Memory budget in bytes to project the bands " +
+                    "block by block. By default bands are projected at once")
+    band_workers: int = Field(
+        default=1,
+        description="Number of bands of a raster processed concurrently")
+    resumable: bool = Field(
+        default=False,
+        description="Whether a failed build resumes where it stopped when " +
+                    "the same request is submitted again")
 
-    def __init__(self, request: CubeBuildRequest, pivot_format=None):
+    def __init__(self, request: CubeBuildRequest, pivot_format=None,
+                 reprojection_memory=None, band_workers=1, resumable=False):
         super().__init__(**request.dict())
 
         self.roi_polygon = roi2geometry(request.roi)
@@ -92,8 +126,16 @@ class ExtendedCubeBuildRequest(CubeBuildRequest, arbitrary_types_allowed=True):
                         raise BadRequest(title="Path does not exist",
                                          detail=file.path)
 
+        if self.compression is None:
+            self.compression = get_output_compression()
+
+        aliases = tuple(alias.alias for alias in self.aliases)
         for band in self.bands:
+            compile_expression(band.expression, aliases)
             band.check_visualistion()
+            band.check_encoding()
+            if band.compression is None:
+                band.compression = self.compression
             if band.rgb is not None:
                 if band.rgb in self.rgb:
                     raise BadRequest(title="Too many bands given for color",
@@ -108,3 +150,6 @@ class ExtendedCubeBuildRequest(CubeBuildRequest, arbitrary_types_allowed=True):
                                     "to the bands of the datacube.")
 
         self.pivot_format = pivot_format
+        self.reprojection_memory = reprojection_memory
+        self.band_workers = band_workers
+        self.resumable = resumable
@@ -8,7 +8,9 @@ import string
 import tarfile
 from datetime import datetime
 from pathlib import Path
+from typing import IO
 
+import attrs
 # Useful for getting the nodata of the band
 import rioxarray  # noqa: F401
 import xarray as xr
@@ -34,13 +36,44 @@ def band_to_STAC_raster_band(band: xr.DataArray) -> Band:
                 nodata=str(band.rio.nodata))
 
 
+@attrs.frozen
+class PivotArchive:
+    """
+    Folder of a datacube in the Pivot archive format, whose zarr is linked
+    instead of copied. It is tarred as it is written to its destination.
+    """
+    id: str
+    folder: str
+    preview_name: str
+    preview: str
+
+    @property
+    def name(self) -> str:
+        return f"{self.id}.TAR"
+
+    def write(self, fileobj: IO[bytes]):
+        """
+        Writes the tarred archive to the stream, the files being read
+        from disk block by block.
+        """
+        with tarfile.open(fileobj=fileobj, mode="w|",
+                          dereference=True) as tar:
+            tar.add(self.folder, arcname=self.id)
+
+    def remove(self):
+        """
+        Removes the folder of the archive, keeping the zarr.
+        """
+        shutil.rmtree(self.folder, ignore_errors=True)
+
+
 def pivot_format_datacube(request: ExtendedCubeBuildRequest,
                           datacube_path: str,
-                          metadata: DatacubeMetadata) -> tuple[str, str, str]:
+                          metadata: DatacubeMetadata) -> PivotArchive:
     """
     Transforms the datacube in the Pivot archive format.
-    Returns the path to the tarred Pivot archive,
-    the name of the preview file and the base64 encoded value of the preview.
+    Returns the archive, with the name of the preview file and
+    the base64 encoded value of the preview.
     """
     # Create the unique id following PFD specifications
     creation_time = datetime.now().isoformat(timespec='seconds') \
@@ -129,20 +162,14 @@ def pivot_format_datacube(request: ExtendedCubeBuildRequest,
     preview_b64 = create_gif(datacube, title, pivot_preview_name,
                              get_gif_size(datacube), pivot_root_folder)
 
-    # Put zarr in folder under the format IMG_DC3_<BANDS>_<ID>.zarr
+    # Link zarr in folder under the format IMG_DC3_<BANDS>_<ID>.zarr,
+    # it is read from its location when tarred
     image_root_folder = path.join(pivot_root_folder, f"IMAGE_{id}")
     os.mkdir(image_root_folder)
-    shutil.copytree(
-        datacube_path,
+    os.symlink(
+        path.abspath(datacube_path),
         path.join(image_root_folder,
                   f"IMG_DC3_{bands}_{request.target_resolution}m_{id}.ZARR"))
 
-    # Tar gz archive
-    archive_path = path.join(str(Path(datacube_path).parent), f"{id}.TAR")
-    with tarfile.open(archive_path, "w") as tar:
-        tar.add(pivot_root_folder, arcname=path.basename(pivot_root_folder))
-
-    # Remove un-tarred folder
-    shutil.rmtree(pivot_root_folder)
-
-    return archive_path, pivot_preview_name, preview_b64
+    return PivotArchive(id=id, folder=pivot_root_folder,
+                        preview_name=pivot_preview_name, preview=preview_b64)
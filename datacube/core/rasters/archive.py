@@ -0,0 +1,188 @@
+import hashlib
+import io
+import json
+import os
+import os.path as path
+import shutil
+import tarfile
+import threading
+import zipfile
+
+from datacube.core.logging.logger import CustomLogger as Logger
+from datacube.core.storage.drivers.abstract import AbstractStorage
+from datacube.core.storage.utils import get_archive_cache_conf
+
+LOGGER = Logger.get_logger()
+
+# Folder of the archive cache holding the indexes of the tar archives
+INDEX_DIR = ".index"
+# Size of the ranges read to parse the archives
+READ_BUFFER_SIZE = 256 * 1024
+# Size of the ranges read to extract a member
+COPY_BUFFER_SIZE = 8 * 1024 ** 2
+
+
+class RangeReader(io.RawIOBase):
+    """
+    Seekable file object reading a file of a storage by range requests.
+    """
+
+    def __init__(self, storage: AbstractStorage, uri: str, size: int):
+        self.storage = storage
+        self.uri = uri
+        self.size = size
+        self.position = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self.position
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        if whence == io.SEEK_CUR:
+            offset += self.position
+        elif whence == io.SEEK_END:
+            offset += self.size
+        if offset < 0:
+            raise ValueError(f"Negative seek position {offset}")
+        self.position = offset
+        return self.position
+
+    def readinto(self, buffer) -> int:
+        length = min(len(buffer), self.size - self.position)
+        if length <= 0:
+            return 0
+        data = self.storage.read_range(self.uri, self.position, length)
+        buffer[:len(data)] = data
+        self.position += len(data)
+        return len(data)
+
+
+class IndexedArchive:
+    """
+    ZIP or TAR archive of a storage, whose members are located without
+    reading it whole, and fetched by range requests.
+
+    The central directory of a ZIP locates its members. A TAR has none,
+    so the offsets of its members are indexed by scanning their headers
+    once, the index being kept in the archive cache for the next builds.
+    The members of compressed TARs can't be located, so these archives
+    are read as streams.
+    """
+
+    def __init__(self, storage: AbstractStorage, uri: str,
+                 tar: bool = False):
+        self.storage = storage
+        self.uri = uri
+        self.tar = tar
+        head = storage.head(uri)
+        self.fingerprint = f"{head.size}-{head.etag}"
+        self.__reader = io.BufferedReader(
+            RangeReader(storage, uri, head.size), READ_BUFFER_SIZE)
+        # Offsets of the data of the members, when they can be read by range
+        self.__offsets: dict[str, int] | None = None
+        if tar:
+            self.__zip = None
+            members, compressed = self.__tar_index()
+            self.__sizes = {name: size for name, (_, size) in members.items()}
+            if not compressed:
+                self.__offsets = {name: offset
+                                  for name, (offset, _) in members.items()}
+        else:
+            self.__zip = zipfile.ZipFile(self.__reader)
+            self.__sizes = {info.filename: info.compress_size
+                            for info in self.__zip.infolist()}
+
+    def __enter__(self) -> "IndexedArchive":
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self):
+        if self.__zip is not None:
+            self.__zip.close()
+        self.__reader.close()
+
+    def names(self) -> list[str]:
+        return list(self.__sizes)
+
+    def size(self, name: str) -> int:
+        """
+        Returns the size of the member as stored in the archive.
+        """
+        return self.__sizes[name]
+
+    def gdal_path(self, name: str) -> str:
+        """
+        Returns the path of the member in GDAL's virtual file systems,
+        the members of the TARs indexed being read directly at their offset.
+        The path of the archive is in braces, as GDAL only finds where it
+        ends by its extension otherwise.
+        """
+        archive_path = self.storage.gdal_path(self.uri)
+        if not self.tar:
+            return f"/vsizip/{{{archive_path}}}/{name}"
+        if self.__offsets is None:
+            return f"/vsitar/{{{archive_path}}}/{name}"
+        return f"/vsisubfile/{self.__offsets[name]}_{self.__sizes[name]}," \
+            + archive_path
+
+    def extract(self, name: str, destination: str):
+        """
+        Writes the member to the destination, reading only its data.
+        """
+        with open(destination, "wb") as f:
+            if not self.tar:
+                with self.__zip.open(name) as member:
+                    shutil.copyfileobj(member, f)
+            elif self.__offsets is None:
+                self.__reader.seek(0)
+                with tarfile.open(fileobj=self.__reader, mode="r:*") as tar:
+                    shutil.copyfileobj(tar.extractfile(name), f)
+            else:
+                offset = self.__offsets[name]
+                end = offset + self.__sizes[name]
+                while offset < end:
+                    length = min(COPY_BUFFER_SIZE, end - offset)
+                    f.write(self.storage.read_range(self.uri, offset, length))
+                    offset += length
+
+    def __tar_index(self) -> tuple[dict[str, list[int]], bool]:
+        """
+        Returns the offset and size of the data of each member of the TAR,
+        and whether it is compressed, from its index if already built.
+        """
+        index_dir = path.join(get_archive_cache_conf()["directory"],
+                              INDEX_DIR)
+        index_path = path.join(index_dir, hashlib.sha256(
+            f"{self.uri}|{self.fingerprint}".encode()).hexdigest() + ".json")
+        if path.exists(index_path):
+            with open(index_path, "r") as f:
+                index = json.load(f)
+            return index["members"], index["compressed"]
+
+        LOGGER.info(f"Indexing the members of {self.uri}")
+        try:
+            with tarfile.open(fileobj=self.__reader, mode="r:") as tar:
+                members = {info.name: [info.offset_data, info.size]
+                           for info in tar.getmembers()}
+            compressed = False
+        except tarfile.ReadError:
+            self.__reader.seek(0)
+            with tarfile.open(fileobj=self.__reader, mode="r:*") as tar:
+                members = {info.name: [info.offset_data, info.size]
+                           for info in tar.getmembers()}
+            compressed = True
+
+        # Written atomically, as the index may be read by another worker
+        os.makedirs(index_dir, exist_ok=True)
+        tmp_path = f"{index_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"members": members, "compressed": compressed}, f)
+        os.replace(tmp_path, index_path)
+        return members, compressed
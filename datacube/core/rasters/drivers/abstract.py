@@ -1,25 +1,54 @@
 import abc
+import contextvars
 import os
 import os.path as path
 import shutil
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Callable, TypeVar
 
 import attrs
+import numpy as np
 import rasterio
 import xarray as xr
+import zarr
 from pydantic import BaseModel, Field
 from rasterio.coords import BoundingBox
 from rasterio.crs import CRS
 from shapely.geometry import Polygon
 
-from datacube.core.geo.xarray import get_chunk_shape
+from datacube.core.cache.archive_cache import ArchiveCache
+from datacube.core.geo.grid import CubeGrid
+from datacube.core.geo.xarray import get_chunk_shape, get_itemsize
 from datacube.core.models.enums import ChunkingStrategy as CStrat
 from datacube.core.models.request.rasterProductType import RasterType
 from datacube.core.storage.drivers.abstract import AbstractStorage
+from datacube.core.storage.utils import use_virtual_file_system
+from datacube.core.rasters.archive import IndexedArchive
 from datacube.core.rasters.raster import Raster
 
 TMP = "tmp"
 FINAL = "final"
 
+T = TypeVar("T")
+
+# Whether the drivers only read the metadata of the rasters, set in the
+# context of the thread estimating a build
+_METADATA_ONLY = contextvars.ContextVar("metadata_only", default=False)
+
+
+@contextmanager
+def metadata_only():
+    """
+    Within this context, the drivers locate the band files without
+    extracting them, recording their sizes instead.
+    """
+    token = _METADATA_ONLY.set(True)
+    try:
+        yield
+    finally:
+        _METADATA_ONLY.reset(token)
+
 
 class CachedAbstractRasterArchive(BaseModel):
     timestamp: int = Field()
@@ -41,6 +70,9 @@ class AbstractRasterArchive(abc.ABC):
     target_resolution: float
     src_bounds: BoundingBox = None
     src_crs: CRS = None
+    gdal_env: dict[str, str] = None
+    fingerprint: str = None
+    band_files_size: dict[str, int] = None
 
     @abc.abstractmethod
     def __init__(self, storage: AbstractStorage, raster_uri: str,
@@ -51,11 +83,55 @@ class AbstractRasterArchive(abc.ABC):
     def set_raster_metadata(self, raster_uri: str, raster_timestamp: int):
         self.raster_uri = raster_uri
         self.raster_timestamp = raster_timestamp
+        self.gdal_env = {}
+        self.fingerprint = None
+        self.band_files_size = {}
+
+    def _read_in_place(self) -> bool:
+        """
+        Whether the band files are read in place through GDAL's virtual
+        file systems instead of being extracted or downloaded.
+        """
+        return use_virtual_file_system() or _METADATA_ONLY.get()
+
+    def _extract_member(self, storage: AbstractStorage,
+                        archive: IndexedArchive,
+                        f_name: str, zip_extract_path: str) -> str:
+        """
+        Returns the local path of the file 'f_name' of the archive.
+        Files already present in 'zip_extract_path' are used as is,
+        the others are extracted through the archive cache.
+        """
+        if path.exists(zip_extract_path + f_name):
+            return path.join(zip_extract_path, f_name)
+
+        self.fingerprint = archive.fingerprint
+        return ArchiveCache.get_member(
+            self.raster_uri, self.fingerprint, f_name,
+            lambda destination: archive.extract(f_name, destination))
+
+    def _get_band_path(self, storage: AbstractStorage,
+                       archive: IndexedArchive,
+                       f_name: str, zip_extract_path: str) -> str:
+        """
+        Returns the path from which the band file 'f_name' of the archive
+        is read. Either the file is read in place through GDAL's virtual
+        file systems, or it is extracted locally.
+        """
+        self.band_files_size[f_name] = archive.size(f_name)
+
+        if self._read_in_place():
+            self.gdal_env = storage.gdal_env()
+            return archive.gdal_path(f_name)
+
+        return self._extract_member(storage, archive,
+                                    f_name, zip_extract_path)
 
     # Loosely inspired from
     # https://gist.github.com/lucaswells/fd2fd73c513872966c1a0257afee1887
     def build_zarr(self, zarr_root_path: str, target_projection: str,
-                   polygon: Polygon = None) -> str:
+                   polygon: Polygon = None, grid: CubeGrid = None,
+                   memory_budget: int = None, band_workers: int = 1) -> str:
         """
         Build a chunked and zarr from raster files.
 
@@ -65,44 +141,60 @@ class AbstractRasterArchive(abc.ABC):
             The root path where the temporary and final zarrs will be created
         polygon: Polygon, optional
             Polygon representing the ROI
-        chunk_mbs : float, optional
-            Desired size (MB) of chunks in zarr file
+        grid: CubeGrid, optional
+            Grid of the datacube on which to directly project the bands
+        memory_budget: int, optional
+            Memory (bytes) to project each band block by block within
+        band_workers: int, optional
+            Number of bands processed concurrently
         """
-        zarr_tmp_root_path = path.join(zarr_root_path, TMP)
+        if grid is not None:
+            return self._build_zarr_on_grid(zarr_root_path, target_projection,
+                                            polygon, grid, memory_budget,
+                                            band_workers)
 
-        # Open all rasters to get the zarr stores
-        zarrs = []
-        max_width = 0
-        max_height = 0
+        zarr_tmp_root_path = path.join(zarr_root_path, TMP)
 
-        # Create all the zarr files/stores
-        # Finds the most precise grid for the zarrs
-        for band, raster_path in self.bands_to_extract.items():
-            with rasterio.open(raster_path, "r+") as raster_reader:
+        def create_band_zarr(band: str, raster_path: str) \
+                -> tuple[Raster, zarr.DirectoryStore]:
+            with rasterio.Env(**self.gdal_env), \
+                    rasterio.open(raster_path, "r") as raster_reader:
                 # Create Raster object
                 raster = Raster(band, raster_reader,
-                                target_projection, polygon)
-
-                self.src_bounds = raster.src_bounds
-                self.src_crs = raster.src_crs
+                                target_projection, polygon,
+                                memory_budget=memory_budget)
 
                 # Create zarr store
                 zarr_dir = raster.create_zarr_dir(
                     zarr_tmp_root_path, self.product_time,
                     self.raster_timestamp)
+                raster.raster_data = None
+                return raster, zarr_dir
 
-                # Retrieve the most precise axis for future interpolation
-                if raster.width > max_width:
-                    max_width = raster.width
-                    with xr.open_zarr(zarr_dir) as ds:
-                        xGrid = ds.get("x")
-                if raster.height > max_height:
-                    max_height = raster.height
-                    with xr.open_zarr(zarr_dir) as ds:
-                        yGrid = ds.get("y")
+        # Open all rasters to get the zarr stores
+        zarrs = []
+        max_width = 0
+        max_height = 0
 
-                zarrs.append(zarr_dir)
-                metadata = raster.metadata
+        # Create all the zarr files/stores
+        # Finds the most precise grid for the zarrs
+        for raster, zarr_dir in self._map_bands(create_band_zarr,
+                                                band_workers):
+            self.src_bounds = raster.src_bounds
+            self.src_crs = raster.src_crs
+
+            # Retrieve the most precise axis for future interpolation
+            if raster.width > max_width:
+                max_width = raster.width
+                with xr.open_zarr(zarr_dir) as ds:
+                    xGrid = ds.get("x")
+            if raster.height > max_height:
+                max_height = raster.height
+                with xr.open_zarr(zarr_dir) as ds:
+                    yGrid = ds.get("y")
+
+            zarrs.append(zarr_dir)
+            metadata = raster.metadata
 
         # Retrieve the zarr stores as xarray objects that are on a same grid
         common_grid = xr.Dataset({"x": xGrid, "y": yGrid})
@@ -111,7 +203,9 @@ class AbstractRasterArchive(abc.ABC):
             with xr.open_zarr(zarr_dir) as xr_zarr:
                 if xr_zarr.dims["x"] != max_width \
                         or xr_zarr.dims["y"] != max_height:
-                    chunk_shape = get_chunk_shape(xr_zarr.dims, CStrat.SPINACH)
+                    chunk_shape = get_chunk_shape(xr_zarr.dims,
+                                                  CStrat.SPINACH,
+                                                  get_itemsize(xr_zarr))
                     xr_zarr = xr_zarr.interp_like(common_grid) \
                                      .chunk(chunk_shape)
                 # If raster is Sentinel2, replace negative values with NaN
@@ -137,6 +231,91 @@ class AbstractRasterArchive(abc.ABC):
 
         return path.join(zarr_root_path, FINAL)
 
+    def _build_zarr_on_grid(self, zarr_root_path: str, target_projection: str,
+                            polygon: Polygon, grid: CubeGrid,
+                            memory_budget: int = None,
+                            band_workers: int = 1) -> str:
+        """
+        Build the zarr of the raster files, with each band projected
+        once on the grid of the datacube. Without memory budget, the bands
+        are written without intermediate zarrs. The bands keep their data
+        type, their pixels without data being set to their nodata value.
+        """
+        zarr_tmp_root_path = path.join(zarr_root_path, TMP)
+
+        def project_band(band: str, raster_path: str) \
+                -> tuple[Raster, xr.DataArray]:
+            with rasterio.Env(**self.gdal_env), \
+                    rasterio.open(raster_path, "r") as raster_reader:
+                raster = Raster(band, raster_reader,
+                                target_projection, polygon, grid,
+                                memory_budget)
+
+                if memory_budget is None:
+                    band_data = xr.DataArray(
+                        raster.xy_data()[..., np.newaxis],
+                        dims=("x", "y", "t"),
+                        coords={"x": raster.x, "y": raster.y,
+                                "t": [self.raster_timestamp]},
+                        name=band)
+                    raster.raster_data = None
+                else:
+                    # Stream the band to a zarr, that is then read lazily
+                    # without replacing its nodata values
+                    band_data = xr.open_zarr(raster.create_zarr_dir(
+                        zarr_tmp_root_path, self.product_time,
+                        self.raster_timestamp), mask_and_scale=False)[band]
+                    band_data.attrs.pop("_FillValue", None)
+                    band_data.encoding = {}
+                # If raster is Sentinel2, consider negative values as nodata
+                if type(self).PRODUCT_TYPE.source == "Sentinel2":
+                    band_data = band_data.where(band_data >= 0, raster.nodata)
+                return raster, band_data
+
+        bands = []
+        encoding = {}
+        for raster, band_data in self._map_bands(project_band, band_workers):
+            self.src_bounds = raster.src_bounds
+            self.src_crs = raster.src_crs
+            bands.append(band_data)
+            # Nodata values are read back as NaN
+            encoding[raster.band] = {"_FillValue": raster.nodata}
+
+        # The bands share the grid of the datacube, so no interpolation needed
+        merged_bands = xr.merge(bands) \
+            .assign_attrs({"product_timestamp": self.product_time})
+        merged_bands.chunk(get_chunk_shape(merged_bands.dims, CStrat.SPINACH,
+                                           get_itemsize(merged_bands))) \
+                    .to_zarr(path.join(zarr_root_path, FINAL), mode="w",
+                             encoding=encoding) \
+                    .close()
+
+        # Clean up the temporary files created
+        del bands
+        del merged_bands
+        if os.path.exists(zarr_tmp_root_path) and \
+                os.path.isdir(zarr_tmp_root_path):
+            shutil.rmtree(zarr_tmp_root_path)
+
+        return path.join(zarr_root_path, FINAL)
+
+    def _map_bands(self, func: Callable[[str, str], T],
+                   band_workers: int = 1) -> list[T]:
+        """
+        Applies 'func' to each (band, raster path) to extract, processing
+        up to 'band_workers' bands concurrently. Results keep the order of
+        the bands.
+        """
+        if band_workers <= 1:
+            return [func(band, raster_path)
+                    for band, raster_path in self.bands_to_extract.items()]
+
+        # Reading and projecting release the GIL, so threads are enough
+        with ThreadPoolExecutor(max_workers=band_workers,
+                                thread_name_prefix="dc3-band") as executor:
+            return list(executor.map(func, self.bands_to_extract.keys(),
+                                     self.bands_to_extract.values()))
+
     def cache_information(self) -> CachedAbstractRasterArchive:
         return CachedAbstractRasterArchive(
             timestamp=self.product_time,
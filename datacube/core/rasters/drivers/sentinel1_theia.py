@@ -1,10 +1,11 @@
 import os.path as path
 import re
+import shutil
 from typing import ClassVar
 from urllib.parse import urlparse
 
-import smart_open as so
 from dateutil import parser
+from datacube.core.cache.archive_cache import ArchiveCache
 from datacube.core.models.enums import SensorFamily
 
 from datacube.core.models.exception import DownloadError
@@ -36,9 +37,7 @@ class Sentinel1_Theia(AbstractRasterArchive):
                           zip_extract_path: str):
         self.bands_to_extract = {}
 
-        params = {'client': storage.client}
-
-        with so.open(raster_uri, "rb", transport_params=params) as fileCloud:
+        with storage.open(raster_uri) as fileCloud:
             f_name = urlparse(raster_uri).path[1:]
 
             if len(re.findall(r".*\_(\w*)\.tiff", f_name)) != 1:
@@ -52,12 +51,24 @@ class Sentinel1_Theia(AbstractRasterArchive):
                 raise DownloadError(title=self.raster_uri,
                                     detail="Production time was not found")
 
-            if not path.exists(zip_extract_path + f_name):
-                with open(path.join(zip_extract_path, f_name), "wb") as f:
-                    f.write(fileCloud.read())
+            # The file is either read in place or downloaded
+            self.band_files_size[f_name] = storage.size(raster_uri)
+            if self._read_in_place():
+                self.gdal_env = storage.gdal_env()
+                self.bands_to_extract[list(bands.keys())[0]] = \
+                    storage.gdal_path(raster_uri)
+            elif path.exists(zip_extract_path + f_name):
+                self.bands_to_extract[list(bands.keys())[0]] = path.join(
+                                zip_extract_path, f_name)
+            else:
+                def download(destination: str):
+                    with open(destination, "wb") as f:
+                        shutil.copyfileobj(fileCloud, f)
 
-            self.bands_to_extract[list(bands.keys())[0]] = path.join(
-                            zip_extract_path, f_name)
+                self.bands_to_extract[list(bands.keys())[0]] = \
+                    ArchiveCache.get_member(
+                        raster_uri, storage.fingerprint(raster_uri),
+                        f_name, download)
 
             if len(bands) != len(self.bands_to_extract):
                 raise DownloadError(title=self.raster_uri,
@@ -1,16 +1,14 @@
 import json
-import os.path as path
 import re
-import tarfile
 from datetime import datetime
 from typing import ClassVar
 
-import smart_open as so
 from datacube.core.models.enums import SensorFamily
 
 from datacube.core.models.exception import DownloadError
 from datacube.core.models.request.rasterProductType import RasterType
 from datacube.core.storage.drivers.abstract import AbstractStorage
+from datacube.core.rasters.archive import IndexedArchive
 from datacube.core.rasters.drivers.abstract import AbstractRasterArchive
 
 PRODUCT_TIME = "Product_Characteristics/ACQUISITION_DATE"
@@ -57,39 +55,34 @@ class Sentinel2_Level1C_Pivot(AbstractRasterArchive):
                           zip_extract_path: str):
         self.bands_to_extract = {}
 
-        params = {'client': storage.client}
+        with IndexedArchive(storage, raster_uri, tar=True) as raster_tar:
+            file_names = raster_tar.names()
+            # Extract timestamp of production of the product
+            for f_name in file_names:
+                if re.match(r".*/CAT_S2._MSI__L1C_.*.JSON", f_name):
+                    with open(self._extract_member(
+                            storage, raster_tar, f_name,
+                            zip_extract_path), 'r') as f:
+                        product_datetime: str = json.load(
+                            f)["properties"]["datetime"]
+                        self.product_time = datetime.timestamp(
+                            datetime.fromisoformat(
+                                product_datetime.replace('Z', '+00:00')))
+                    break
+
+            if not hasattr(self, 'product_time'):
+                raise DownloadError(title=self.raster_uri,
+                                    detail="Production time was not found")
 
-        with so.open(raster_uri, "rb", transport_params=params) as fb:
-            with tarfile.open(fileobj=fb) as raster_tar:
-                file_names = raster_tar.getnames()
-                # Extract timestamp of production of the product
+            for datacube_band, product_band in bands.items():
                 for f_name in file_names:
-                    if re.match(r".*/CAT_S2._MSI__L1C_.*.JSON", f_name):
-                        if not path.exists(zip_extract_path + f_name):
-                            raster_tar.extract(f_name, zip_extract_path)
-                        with open(zip_extract_path + f_name, 'r') as f:
-                            product_datetime: str = json.load(
-                                f)["properties"]["datetime"]
-                            self.product_time = datetime.timestamp(
-                                datetime.fromisoformat(
-                                    product_datetime.replace('Z', '+00:00')))
-                        break
-
-                if not hasattr(self, 'product_time'):
-                    raise DownloadError(title=self.raster_uri,
-                                        detail="Production time was not found")
-
-                for datacube_band, product_band in bands.items():
-                    for f_name in file_names:
-                        if re.match(rf".*/IMG_MSI_{product_band}_10m" +
-                                    r"_S2._MSI__L1C_.*\.JP2", f_name):
-                            if not path.exists(zip_extract_path + f_name):
-                                raster_tar.extract(f_name, zip_extract_path)
+                    if re.match(rf".*/IMG_MSI_{product_band}_10m" +
+                                r"_S2._MSI__L1C_.*\.JP2", f_name):
+                        self.bands_to_extract[datacube_band] = \
+                            self._get_band_path(storage, raster_tar,
+                                                f_name, zip_extract_path)
 
-                            self.bands_to_extract[datacube_band] = path.join(
-                                zip_extract_path, f_name)
-
-                if len(bands) != len(self.bands_to_extract):
-                    raise DownloadError(title=self.raster_uri,
-                                        detail="Some of the required files " +
-                                               "were not found")
+            if len(bands) != len(self.bands_to_extract):
+                raise DownloadError(title=self.raster_uri,
+                                    detail="Some of the required files " +
+                                           "were not found")
@@ -1,10 +1,7 @@
-import os.path as path
 import re
-import zipfile
 from datetime import datetime
 from typing import ClassVar
 
-import smart_open as so
 from dateutil import parser
 from lxml import etree
 from datacube.core.models.enums import SensorFamily
@@ -12,6 +9,7 @@ from datacube.core.models.enums import SensorFamily
 from datacube.core.models.exception import DownloadError
 from datacube.core.models.request.rasterProductType import RasterType
 from datacube.core.storage.drivers.abstract import AbstractStorage
+from datacube.core.rasters.archive import IndexedArchive
 from datacube.core.rasters.drivers.abstract import AbstractRasterArchive
 
 PRODUCT_START_TIME = "n1:General_Info/Product_Info/PRODUCT_START_TIME"
@@ -39,11 +37,10 @@ class Sentinel2_Level2A_Safe(AbstractRasterArchive):
 
     def _findBandsResolution(self, bands: dict[str, str],
                              target_resolution: int):
-        # Force the resolution to be higher than HIGH_RESOLUTION
+        # Force the resolution to be higher than HIGH_RESOLUTION. Bands only
+        # available at a finer resolution, like B08, don't force the others
+        # to be read at their finest resolution
         self.target_resolution = max(HIGH_RESOLUTION, target_resolution)
-        # Force the resolution to be at least of the most precise band
-        if "B08" in bands:
-            self.target_resolution = HIGH_RESOLUTION
 
         self.bandsWithResolution = {}
         for band in bands.values():
@@ -110,48 +107,42 @@ class Sentinel2_Level2A_Safe(AbstractRasterArchive):
                           zip_extract_path: str):
         self.bands_to_extract = {}
 
-        params = {'client': storage.client}
+        with IndexedArchive(storage, raster_uri) as raster_zip:
+            file_names = raster_zip.names()
+            # Extract timestamp of production of the product
+            for f_name in file_names:
+                if re.match(r".*MTD_MSI.*\.xml", f_name):
+                    metadata: etree._ElementTree = etree.parse(
+                        self._extract_member(storage, raster_zip,
+                                             f_name, zip_extract_path))
+                    root: etree._Element = metadata.getroot()
+                    start_time = parser.parse(root.xpath(
+                        PRODUCT_START_TIME, namespaces=root.nsmap)[0].text)
+
+                    end_time = parser.parse(root.xpath(
+                        PRODUCT_STOP_TIME, namespaces=root.nsmap)[0].text)
+
+                    self.product_time = int(
+                        (datetime.timestamp(start_time)
+                         + datetime.timestamp(end_time)) / 2)
+                    break
+
+            if not hasattr(self, 'product_time'):
+                raise DownloadError(title=self.raster_uri,
+                                    detail="Production time was not found")
 
-        with so.open(raster_uri, "rb", transport_params=params) as fb:
-            with zipfile.ZipFile(fb) as raster_zip:
-                file_names = raster_zip.namelist()
-                # Extract timestamp of production of the product
+            for datacube_band, product_band in bands.items():
+                bandResolution = self.bandsWithResolution[product_band]
                 for f_name in file_names:
-                    if re.match(r".*MTD_MSI.*\.xml", f_name):
-                        if not path.exists(zip_extract_path + f_name):
-                            raster_zip.extract(f_name, zip_extract_path)
-                        metadata: etree._ElementTree = etree.parse(
-                            zip_extract_path + f_name)
-                        root: etree._Element = metadata.getroot()
-                        start_time = parser.parse(root.xpath(
-                            PRODUCT_START_TIME, namespaces=root.nsmap)[0].text)
-
-                        end_time = parser.parse(root.xpath(
-                            PRODUCT_STOP_TIME, namespaces=root.nsmap)[0].text)
-
-                        self.product_time = int(
-                            (datetime.timestamp(start_time)
-                             + datetime.timestamp(end_time)) / 2)
-                        break
-
-                if not hasattr(self, 'product_time'):
-                    raise DownloadError(title=self.raster_uri,
-                                        detail="Production time was not found")
-
-                for datacube_band, product_band in bands.items():
-                    bandResolution = self.bandsWithResolution[product_band]
-                    for f_name in file_names:
-                        if re.match(rf".*/IMG_DATA/R{bandResolution}m/.*" +
-                                    rf"{product_band}_{bandResolution}m\.jp2",
-                                    f_name):
-
-                            if not path.exists(zip_extract_path + f_name):
-                                raster_zip.extract(f_name, zip_extract_path)
-
-                            self.bands_to_extract[datacube_band] = path.join(
-                                zip_extract_path, f_name)
-
-                if len(bands) != len(self.bands_to_extract):
-                    raise DownloadError(title=self.raster_uri,
-                                        detail="Some of the required files " +
-                                               "were not found")
+                    if re.match(rf".*/IMG_DATA/R{bandResolution}m/.*" +
+                                rf"{product_band}_{bandResolution}m\.jp2",
+                                f_name):
+
+                        self.bands_to_extract[datacube_band] = \
+                            self._get_band_path(storage, raster_zip,
+                                                f_name, zip_extract_path)
+
+            if len(bands) != len(self.bands_to_extract):
+                raise DownloadError(title=self.raster_uri,
+                                    detail="Some of the required files " +
+                                           "were not found")
@@ -1,10 +1,7 @@
-import os.path as path
 import re
-import zipfile
 from datetime import datetime
 from typing import ClassVar
 
-import smart_open as so
 from dateutil import parser
 from lxml import etree
 from datacube.core.models.enums import SensorFamily
@@ -12,6 +9,7 @@ from datacube.core.models.enums import SensorFamily
 from datacube.core.models.exception import DownloadError
 from datacube.core.models.request.rasterProductType import RasterType
 from datacube.core.storage.drivers.abstract import AbstractStorage
+from datacube.core.rasters.archive import IndexedArchive
 from datacube.core.rasters.drivers.abstract import AbstractRasterArchive
 
 PRODUCT_TIME = "Product_Characteristics/" + \
@@ -52,40 +50,34 @@ class TheiaSnow(AbstractRasterArchive):
                           zip_extract_path: str):
         self.bands_to_extract = {}
 
-        params = {'client': storage.client}
+        with IndexedArchive(storage, raster_uri) as raster_zip:
+            file_names = raster_zip.names()
+            # Extract timestamp of production of the product
+            for f_name in file_names:
+                if re.match(r".*/.*\_ALL\.xml", f_name):
+                    metadata: etree._ElementTree = etree.parse(
+                        self._extract_member(storage, raster_zip,
+                                             f_name, zip_extract_path))
+                    root: etree._Element = metadata.getroot()
+
+                    self.product_time = int(datetime.timestamp(
+                        parser.parse(root.xpath(
+                            PRODUCT_TIME,
+                            namespaces=root.nsmap)[0].text)))
+                    break
+
+            if not hasattr(self, 'product_time'):
+                raise DownloadError(title=self.raster_uri,
+                                    detail="Production time was not found")
 
-        with so.open(raster_uri, "rb", transport_params=params) as fb:
-            with zipfile.ZipFile(fb) as raster_zip:
-                file_names = raster_zip.namelist()
-                # Extract timestamp of production of the product
+            for datacube_band, product_band in bands.items():
                 for f_name in file_names:
-                    if re.match(r".*/.*\_ALL\.xml", f_name):
-                        if not path.exists(zip_extract_path + f_name):
-                            raster_zip.extract(f_name, zip_extract_path)
-                        metadata: etree._ElementTree = etree.parse(
-                            zip_extract_path + f_name)
-                        root: etree._Element = metadata.getroot()
-
-                        self.product_time = int(datetime.timestamp(
-                            parser.parse(root.xpath(
-                                PRODUCT_TIME,
-                                namespaces=root.nsmap)[0].text)))
-                        break
-
-                if not hasattr(self, 'product_time'):
-                    raise DownloadError(title=self.raster_uri,
-                                        detail="Production time was not found")
+                    if re.match(rf".*/.*{product_band}_R2.tif", f_name):
+                        self.bands_to_extract[datacube_band] = \
+                            self._get_band_path(storage, raster_zip,
+                                                f_name, zip_extract_path)
 
-                for datacube_band, product_band in bands.items():
-                    for f_name in file_names:
-                        if re.match(rf".*/.*{product_band}_R2.tif", f_name):
-                            if not path.exists(zip_extract_path + f_name):
-                                raster_zip.extract(f_name, zip_extract_path)
-
-                            self.bands_to_extract[datacube_band] = path.join(
-                                zip_extract_path, f_name)
-
-                if len(bands) != len(self.bands_to_extract):
-                    raise DownloadError(title=self.raster_uri,
-                                        detail="Some of the required bands " +
-                                               "were not found")
+            if len(bands) != len(self.bands_to_extract):
+                raise DownloadError(title=self.raster_uri,
+                                    detail="Some of the required bands " +
+                                           "were not found")
@@ -0,0 +1,134 @@
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+
+import attrs
+import numpy as np
+import rasterio
+from rasterio.crs import CRS
+from rasterio.io import DatasetReader
+from rasterio.transform import IDENTITY
+from rasterio.warp import transform_bounds
+from shapely.geometry import Polygon
+
+from datacube.core.geo.utils import bbox2polygon, project_polygon
+from datacube.core.logging.logger import CustomLogger as Logger
+from datacube.core.models.exception import AbstractException
+from datacube.core.models.request.cubeBuild import ExtendedCubeBuildRequest
+from datacube.core.models.request.rasterFile import RasterFile
+from datacube.core.rasters.drivers.abstract import metadata_only
+from datacube.core.storage.utils import create_input_storage
+from datacube.core.utils import get_product_bands, get_raster_driver
+
+LOGGER = Logger.get_logger()
+
+# Number of rasters whose profile is read concurrently
+PROFILE_WORKERS = 8
+# Projection of the footprints of the rasters
+FOOTPRINT_CRS = "EPSG:4326"
+
+
+@attrs.frozen
+class RasterProfile:
+    """
+    What is known of a raster from its metadata only.
+    """
+    path: str
+    # Size in bytes of the band files to download
+    band_files_size: int
+    # Data type of each product band
+    dtypes: dict[str, np.dtype]
+    # Bounding box of the raster in FOOTPRINT_CRS, None if its metadata
+    # could not be read
+    footprint: Polygon | None
+    # Why the metadata could not be read
+    error: str | None = None
+
+    def intersects(self, roi: Polygon, crs: str) -> bool:
+        """
+        Tells whether the raster may intersect the ROI expressed in 'crs'.
+        A raster whose footprint is unknown is assumed to intersect it.
+        """
+        if self.footprint is None:
+            return True
+        return self.footprint.intersects(
+            project_polygon(roi, crs, FOOTPRINT_CRS))
+
+
+def _band_bounds(raster_reader: DatasetReader) \
+        -> tuple[float, float, float, float]:
+    """
+    Returns the bounds of the band file in FOOTPRINT_CRS, from its header
+    only.
+    """
+    src_crs = raster_reader.crs or CRS.from_epsg(4326)
+    bounds = raster_reader.bounds
+    # Some raster files are not georeferenced with transform but with GCP
+    if raster_reader.transform == IDENTITY and raster_reader.gcps[0]:
+        gcps, gcps_crs = raster_reader.gcps
+        src_crs = gcps_crs or src_crs
+        bounds = (min(gcp.x for gcp in gcps), min(gcp.y for gcp in gcps),
+                  max(gcp.x for gcp in gcps), max(gcp.y for gcp in gcps))
+    return transform_bounds(src_crs, FOOTPRINT_CRS, *bounds)
+
+
+def read_raster_profile(raster_file: RasterFile, timestamp: int,
+                        bands: dict[str, str], target_resolution: int,
+                        zip_extract_path: str) -> RasterProfile:
+    """
+    Reads the metadata of the raster archive and the header of its band
+    files, without extracting them. If they can't be read, the profile
+    has no footprint, the build finding out why when downloading it.
+    """
+    try:
+        with metadata_only():
+            raster_archive = get_raster_driver(raster_file.type)(
+                create_input_storage(urlparse(raster_file.path).scheme),
+                raster_file.path, bands, target_resolution, timestamp,
+                zip_extract_path)
+
+        dtypes = {}
+        xmin, ymin, xmax, ymax = np.inf, np.inf, -np.inf, -np.inf
+        with rasterio.Env(**raster_archive.gdal_env):
+            for band, raster_path in raster_archive.bands_to_extract.items():
+                with rasterio.open(raster_path, "r") as raster_reader:
+                    dtypes[band] = np.dtype(raster_reader.dtypes[0])
+                    bounds = _band_bounds(raster_reader)
+                xmin, ymin = min(xmin, bounds[0]), min(ymin, bounds[1])
+                xmax, ymax = max(xmax, bounds[2]), max(ymax, bounds[3])
+
+        return RasterProfile(
+            path=raster_file.path,
+            band_files_size=sum(raster_archive.band_files_size.values()),
+            dtypes=dtypes,
+            footprint=bbox2polygon(xmin, ymin, xmax, ymax))
+    except Exception as e:
+        error = e.detail if isinstance(e, AbstractException) else str(e)
+        LOGGER.warning(f"[{raster_file.path}] Profile not read: {error}")
+        return RasterProfile(path=raster_file.path, band_files_size=0,
+                             dtypes={}, footprint=None, error=error)
+
+
+def read_raster_profiles(request: ExtendedCubeBuildRequest,
+                         zip_extract_path: str) -> list[list[RasterProfile]]:
+    """
+    Reads the profiles of the rasters of each group of the composition.
+    """
+    product_bands: dict[str, dict[str, str]] = {}
+    rasters = []
+    for group in request.composition:
+        for raster_file in group.rasters:
+            type_key = raster_file.type.to_key()
+            if type_key not in product_bands:
+                product_bands[type_key] = get_product_bands(
+                    request, raster_file.type)
+            rasters.append((raster_file, group.timestamp,
+                            product_bands[type_key],
+                            request.target_resolution, zip_extract_path))
+
+    with ThreadPoolExecutor(max_workers=PROFILE_WORKERS,
+                            thread_name_prefix="dc3-profile") as executor:
+        profiles = iter(executor.map(
+            lambda raster: read_raster_profile(*raster), rasters))
+
+    return [[next(profiles) for _ in group.rasters]
+            for group in request.composition]
@@ -5,26 +5,78 @@ import numpy as np
 import zarr
 from rasterio.coords import BoundingBox
 from rasterio.crs import CRS
+from rasterio.errors import WindowError
+from rasterio.features import geometry_mask
 from rasterio.io import DatasetReader
-from rasterio.mask import mask
-from rasterio.transform import IDENTITY, from_gcps
+from rasterio.transform import IDENTITY, Affine, array_bounds, from_gcps
 from rasterio.warp import (Resampling, calculate_default_transform, reproject,
                            transform_bounds)
+from rasterio.windows import Window, from_bounds
+from rasterio.windows import transform as window_transform
 from shapely.geometry import Polygon
 
+from datacube.core.geo.grid import CubeGrid
 from datacube.core.geo.utils import project_polygon
 from datacube.core.geo.xarray import get_chunk_shape
 from datacube.core.models.enums import ChunkingStrategy as CStrat
 
+# Approximate number of copies of a block held in memory when streaming:
+# the projected block, the source block and its mask
+STREAMING_BLOCK_COPIES = 3
+
+
+def bounds_window(raster_reader: DatasetReader, reader_transform: Affine,
+                  bounds: tuple[float, float, float, float],
+                  padding: int = 0) -> Window:
+    """
+    Computes the smallest window of pixels of the raster containing
+    the bounds, expressed in the raster's referential.
+    """
+    window = from_bounds(*bounds, transform=reader_transform)
+    col_off = math.floor(min(window.col_off,
+                             window.col_off + window.width)) - padding
+    row_off = math.floor(min(window.row_off,
+                             window.row_off + window.height)) - padding
+
+    return Window(col_off, row_off,
+                  math.ceil(max(window.col_off,
+                                window.col_off + window.width))
+                  + padding - col_off,
+                  math.ceil(max(window.row_off,
+                                window.row_off + window.height))
+                  + padding - row_off) \
+        .intersection(Window(0, 0, raster_reader.width, raster_reader.height))
+
+
+def roi_window(raster_reader: DatasetReader, reader_transform: Affine,
+               polygon: Polygon) -> Window:
+    """
+    Computes the smallest window of pixels of the raster
+    containing the polygon, expressed in the raster's referential.
+    """
+    return bounds_window(raster_reader, reader_transform, polygon.bounds)
+
 
 class Raster:
 
     def __init__(self, band: str, raster_reader: DatasetReader,
-                 target_projection, polygon: Polygon):
+                 target_projection, polygon: Polygon, grid: CubeGrid = None,
+                 memory_budget: int = None):
+        """
+        Prepares the projection of the band in the target projection.
+        By default, the band is read and projected at once. If a memory
+        budget (in bytes) is given, it is instead read, projected and
+        written block by block when creating its zarr.
+        """
         self.band = band
         self.dtype = raster_reader.dtypes[0].lower()
+        # Pixels without data are stored with the nodata value of the raster,
+        # 0 by default
+        self.nodata = np.dtype(self.dtype).type(
+            raster_reader.nodata if raster_reader.nodata is not None else 0)
         self.crs = target_projection
         self.src_crs = raster_reader.crs
+        self.memory_budget = memory_budget
 
         # Extract the ROI in local referential
         if self.src_crs is None:
@@ -33,7 +85,8 @@ class Raster:
                 polygon, target_projection, self.src_crs)
 
         # Some raster files are not georeferenced with transform but with GCP
-        if raster_reader.transform == IDENTITY:
+        reader_transform = raster_reader.transform
+        if reader_transform == IDENTITY:
             gcps = raster_reader.get_gcps()[0]
             ul = gcps[0]
             end_of_row = math.ceil(raster_reader.bounds.right / gcps[1].col)
@@ -41,15 +94,17 @@ class Raster:
             ll = gcps[- 1 - end_of_row]
             lr = gcps[-1]
 
-            raster_reader.transform = from_gcps([ul, ur, ll, lr])
-
-        self.raster_data, src_transform = mask(
-            raster_reader, [local_proj_polygon], crop=True)
+            reader_transform = from_gcps([ul, ur, ll, lr])
 
-        self.raster_data: np.ndarray = np.squeeze(self.raster_data)
+        self._reader = raster_reader
+        self._reader_transform = reader_transform
+        self._polygon = local_proj_polygon
 
-        self.width = self.raster_data.shape[1]
-        self.height = self.raster_data.shape[0]
+        # Only the window of the raster that contains the ROI is read
+        self._src_window = roi_window(raster_reader, reader_transform,
+                                      local_proj_polygon)
+        self.width = int(self._src_window.width)
+        self.height = int(self._src_window.height)
 
         # Find the new bounding box of the data
         self.src_bounds = raster_reader.bounds
@@ -64,28 +119,112 @@ class Raster:
             raster_polygon).bounds
         self.bounds = BoundingBox(*intersection_bounds)
 
-        # Project the raster in the target projection
-        self.transform, self.width, self.height = calculate_default_transform(
-            self.src_crs, target_projection,
-            self.width, self.height, *self.bounds)
+        if grid is None:
+            # Project the raster in the target projection
+            self.transform, self.width, self.height = \
+                calculate_default_transform(
+                    self.src_crs, target_projection,
+                    self.width, self.height, *self.bounds)
 
-        self.bounds = transform_bounds(
-            self.src_crs, target_projection, *self.bounds)
+            self.bounds = transform_bounds(
+                self.src_crs, target_projection, *self.bounds)
 
-        projected_raster_data = np.zeros((self.height, self.width))
+            xmin, ymin, xmax, ymax = self.bounds
+            self.x = np.arange(xmin, xmax, (xmax - xmin) / self.width) \
+                .astype("float32")
+            self.y = np.arange(ymin, ymax, (ymax - ymin) / self.height) \
+                .astype("float32")
+        else:
+            # Project the raster directly on the part of the cube's grid
+            # that it covers
+            x_slice, y_slice = grid.window(transform_bounds(
+                self.src_crs, target_projection, *self.bounds))
+            self.x = grid.x[x_slice]
+            self.y = grid.y[y_slice]
+            if len(self.x) == 0 or len(self.y) == 0:
+                raise ValueError(f"Band {band} does not intersect the " +
+                                 "grid of the datacube")
+            self.width = len(self.x)
+            self.height = len(self.y)
+            self.transform = grid.transform(x_slice, y_slice)
+            self.bounds = (self.x[0] - grid.step / 2,
+                           self.y[0] - grid.step / 2,
+                           self.x[-1] + grid.step / 2,
+                           self.y[-1] + grid.step / 2)
 
-        reproject(source=self.raster_data,
+        if self.memory_budget is None:
+            self.raster_data = self._project(self._src_window,
+                                             0, 0, self.width, self.height)
+        else:
+            self.raster_data = None
+
+        self.metadata = {}
+
+    def _project(self, src_window: Window, col_off: int, row_off: int,
+                 width: int, height: int) -> np.ndarray:
+        """
+        Reads the source window, masks the pixels outside of the ROI and
+        projects it on the block of the target grid starting at
+        (col_off, row_off) and of size (width, height).
+        """
+        src_transform = window_transform(src_window, self._reader_transform)
+        raster_data = self._reader.read(window=src_window)
+        raster_data[..., geometry_mask(
+            [self._polygon], out_shape=raster_data.shape[-2:],
+            transform=src_transform)] = self.nodata
+        raster_data = np.squeeze(raster_data)
+
+        # The data is projected in its native data type
+        projected_raster_data = self._nodata_block(width, height)
+
+        reproject(source=raster_data,
                   destination=projected_raster_data,
                   src_crs=self.src_crs,
-                  src_nodata=raster_reader.nodata,
+                  src_nodata=self.nodata,
                   src_transform=src_transform,
-                  dst_crs=target_projection,
-                  dst_nodata=None,
-                  dst_transform=self.transform,
+                  dst_crs=self.crs,
+                  dst_nodata=self.nodata,
+                  dst_transform=self.transform
+                  * Affine.translation(col_off, row_off),
                   resampling=Resampling.nearest)
-        self.raster_data = projected_raster_data
+        return projected_raster_data
 
-        self.metadata = {}
+    def _nodata_block(self, width: int, height: int) -> np.ndarray:
+        return np.full((height, width), self.nodata, dtype=self.dtype)
+
+    def _project_block(self, col_off: int, row_off: int,
+                       width: int, height: int) -> np.ndarray:
+        """
+        Projects the block of the target grid, reading only the part of
+        the source raster that it covers.
+        """
+        block_bounds = transform_bounds(
+            self.crs, self.src_crs, *array_bounds(
+                height, width,
+                self.transform * Affine.translation(col_off, row_off)))
+        try:
+            # Pad the window to keep the neighbours of the edge pixels
+            src_window = bounds_window(
+                self._reader, self._reader_transform, block_bounds,
+                padding=1).intersection(self._src_window)
+        except WindowError:
+            return self._nodata_block(width, height)
+        return self._project(src_window, col_off, row_off, width, height)
+
+    def _blocks_shape(self, chunk_shape: dict[str, int]) -> tuple[int, int]:
+        """
+        Finds the size (width, height) of the blocks projected at once, made
+        of whole zarr chunks and fitting in the memory budget when possible.
+        """
+        pixels = self.memory_budget // (STREAMING_BLOCK_COPIES
+                                        * np.dtype(self.dtype).itemsize)
+        chunk_x, chunk_y = chunk_shape["x"], chunk_shape["y"]
+
+        if pixels >= self.width * chunk_y:
+            return self.width, min(self.height, max(
+                chunk_y, (pixels // self.width) // chunk_y * chunk_y))
+        return min(self.width, max(
+            chunk_x, (pixels // chunk_y) // chunk_x * chunk_x)), chunk_y
 
     def create_zarr_dir(self, zarr_root_path: str,
                         product_timestamp: int,
@@ -93,25 +232,24 @@ class Raster:
 
         store = zarr.DirectoryStore(path.join(zarr_root_path, self.band))
 
-        xmin, ymin, xmax, ymax = self.bounds
         x = zarr.create(
             shape=(self.width,),
-            dtype='float32',
+            dtype=self.x.dtype,
             store=store,
             overwrite=True,
             path="x"
         )
-        x[:] = np.arange(xmin, xmax, (xmax - xmin) / self.width)
+        x[:] = self.x
         x.attrs['_ARRAY_DIMENSIONS'] = ['x']
 
         y = zarr.create(
             shape=(self.height,),
-            dtype='float32',
+            dtype=self.y.dtype,
             store=store,
             overwrite=True,
             path="y"
         )
-        y[:] = np.arange(ymin, ymax, (ymax - ymin) / self.height)
+        y[:] = self.y
         y.attrs['_ARRAY_DIMENSIONS'] = ['y']
 
         t = zarr.create(
@@ -125,13 +263,15 @@ class Raster:
         t.attrs['_ARRAY_DIMENSIONS'] = ['t']
 
         chunk_shape = get_chunk_shape(
-            {"x": self.width, "y": self.height, "t": 1}, CStrat.SPINACH)
+            {"x": self.width, "y": self.height, "t": 1}, CStrat.SPINACH,
+            np.dtype(self.dtype).itemsize)
 
         # Create zarr array for each band required
         zarray = zarr.create(
             shape=(self.width, self.height, 1),
             chunks=tuple(chunk_shape.values()),
             dtype=self.dtype,
+            fill_value=self.nodata,
             store=store,
             overwrite=True,
             path=self.band
@@ -141,9 +281,29 @@ class Raster:
         zarray.attrs['_ARRAY_DIMENSIONS'] = ['x', 'y', 't']
         self.metadata['product_timestamp'] = product_timestamp
 
-        zarray[:, :, 0] = np.flip(np.transpose(self.raster_data), 1)
+        if self.raster_data is not None:
+            zarray[:, :, 0] = self.xy_data()
+        else:
+            # Project and write the band block by block, the rows of the
+            # projected data being in the reverse order of the y axis
+            block_width, block_height = self._blocks_shape(chunk_shape)
+            for x_start in range(0, self.width, block_width):
+                x_end = min(x_start + block_width, self.width)
+                for y_start in range(0, self.height, block_height):
+                    y_end = min(y_start + block_height, self.height)
+                    block = self._project_block(
+                        x_start, self.height - y_end,
+                        x_end - x_start, y_end - y_start)
+                    zarray[x_start:x_end, y_start:y_end, 0] = \
+                        np.flip(np.transpose(block), 1)
 
         # Consolidate the metadata into a single .zmetadata file
         zarr.consolidate_metadata(store)
 
         return store
+
+    def xy_data(self) -> np.ndarray:
+        """
+        Returns the projected data indexed by (x, y), with y ascending.
+        """
+        return np.flip(np.transpose(self.raster_data), 1)
@@ -0,0 +1,119 @@
+import hashlib
+import json
+import os
+import threading
+
+import boto3
+import requests
+from botocore.config import Config
+from google.auth.transport.requests import AuthorizedSession
+from google.cloud.storage import Client
+from google.oauth2 import service_account
+from requests.adapters import HTTPAdapter
+
+# Default number of connections kept open by a client
+DEFAULT_POOL_SIZE = 16
+
+# Clients and credentials of the object stores, shared by the whole
+# process and keyed by the hash of their configuration
+_LOCK = threading.Lock()
+_CREDENTIALS: dict[str, service_account.Credentials] = {}
+_CLIENTS: dict[str, Client] = {}
+_S3_CLIENTS: dict[str, any] = {}
+_HTTP_SESSIONS: dict[str, requests.Session] = {}
+
+
+def _key(conf: dict) -> str:
+    account = json.dumps(dict(conf), sort_keys=True, default=str)
+    return hashlib.sha256(account.encode()).hexdigest()
+
+
+def _reset_after_fork():
+    """
+    Starts a forked worker without the clients of its parent, whose
+    connections it must not share, and with a new lock, as the lock may
+    have been held by another thread of the parent when it forked.
+    """
+    global _LOCK
+    _LOCK = threading.Lock()
+    _CREDENTIALS.clear()
+    _CLIENTS.clear()
+    _S3_CLIENTS.clear()
+    _HTTP_SESSIONS.clear()
+
+
+os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+def get_gcs_credentials(api_key: dict) -> service_account.Credentials:
+    """
+    Returns the credentials of the service account, whose access token
+    is cached and refreshed when it expires.
+    """
+    key = _key(api_key)
+    with _LOCK:
+        if key not in _CREDENTIALS:
+            _CREDENTIALS[key] = service_account.Credentials \
+                .from_service_account_info(
+                    api_key, scopes=Client.SCOPE)
+        return _CREDENTIALS[key]
+
+
+def get_gcs_client(api_key: dict, pool_size: int) -> Client:
+    """
+    Returns the client of the service account, created once per process.
+    Its HTTP session keeps up to 'pool_size' connections open per host,
+    reused by all the downloads and uploads. The pool size is that of the
+    first call for the account.
+    """
+    credentials = get_gcs_credentials(api_key)
+    key = _key(api_key)
+    with _LOCK:
+        if key not in _CLIENTS:
+            session = AuthorizedSession(credentials)
+            adapter = HTTPAdapter(pool_connections=pool_size,
+                                  pool_maxsize=pool_size)
+            session.mount("https://", adapter)
+            _CLIENTS[key] = Client("DataCubeBuilder",
+                                   credentials=credentials, _http=session)
+        return _CLIENTS[key]
+
+
+def get_s3_client(endpoint_url: str | None, region: str | None,
+                  access_key_id: str | None, secret_access_key: str | None,
+                  pool_size: int):
+    """
+    Returns the client of the S3 compatible object store for the access
+    key, created once per process with up to 'pool_size' connections.
+    The credentials of the environment are used if no key is given.
+    """
+    key = _key({"endpoint_url": endpoint_url, "region": region,
+                "access_key_id": access_key_id,
+                "secret_access_key": secret_access_key})
+    with _LOCK:
+        if key not in _S3_CLIENTS:
+            _S3_CLIENTS[key] = boto3.session.Session().client(
+                "s3", endpoint_url=endpoint_url, region_name=region,
+                aws_access_key_id=access_key_id,
+                aws_secret_access_key=secret_access_key,
+                config=Config(max_pool_connections=pool_size))
+        return _S3_CLIENTS[key]
+
+
+def get_http_session(headers: dict[str, str], pool_size: int) \
+        -> requests.Session:
+    """
+    Returns the HTTP session sending the headers, created once per process
+    with up to 'pool_size' connections per host.
+    """
+    key = _key(headers)
+    with _LOCK:
+        if key not in _HTTP_SESSIONS:
+            session = requests.Session()
+            session.headers.update(headers)
+            adapter = HTTPAdapter(pool_connections=pool_size,
+                                  pool_maxsize=pool_size)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            _HTTP_SESSIONS[key] = session
+        return _HTTP_SESSIONS[key]
@@ -1,8 +1,108 @@
 import abc
+from typing import IO
+
+import attrs
+import smart_open as so
+from fsspec import FSMap
+
+from datacube.core.models.exception import BadRequest
+
+
+@attrs.frozen
+class StorageObject:
+    """
+    Metadata of a file of a storage.
+    """
+    uri: str
+    size: int
+    # Identifier of the version of the file
+    etag: str
 
 
 class AbstractStorage(abc.ABC):
+    # Name of the section configuring the storage
+    NAME: str
+    # Schemes of the URIs of the files of the storage
+    SCHEMES: tuple[str, ...]
     client: any
 
     def __init__(self):
         pass
+
+    @classmethod
+    def from_conf(cls, conf: dict) -> "AbstractStorage":
+        """
+        Creates the storage from its section of the configuration.
+        """
+        return cls()
+
+    def transport_params(self) -> dict:
+        """
+        Returns the transport parameters of smart_open for the storage.
+        """
+        return {"client": self.client}
+
+    def open(self, uri: str, mode: str = "rb") -> IO[bytes]:
+        """
+        Opens the file as a stream. The reads are ranged requests following
+        the seeks, and the writes of object stores multipart uploads.
+        """
+        return so.open(uri, mode, transport_params=self.transport_params())
+
+    def read_range(self, uri: str, start: int, length: int) -> bytes:
+        """
+        Reads 'length' bytes of the file from the offset 'start'.
+        """
+        with self.open(uri) as fb:
+            fb.seek(start)
+            return fb.read(length)
+
+    @abc.abstractmethod
+    def head(self, uri: str) -> StorageObject:
+        """
+        Returns the metadata of the file, without reading it.
+        """
+        pass
+
+    def list(self, uri: str) -> list[str]:
+        """
+        Returns the URIs of the files whose URI starts with 'uri'. The
+        storages that can't list their files raise a BadRequest.
+        """
+        raise BadRequest(title="Files can't be listed",
+                         detail=f"The files of {uri} can't be listed " +
+                                f"in the {self.NAME} storage")
+
+    @abc.abstractmethod
+    def mapper(self, uri: str) -> FSMap | str:
+        """
+        Returns the mapping to write a zarr at the URI,
+        the path itself for local files.
+        """
+        pass
+
+    def gdal_path(self, uri: str) -> str:
+        """
+        Returns the path of the file in GDAL's virtual file systems.
+        """
+        return uri
+
+    def gdal_env(self) -> dict[str, str]:
+        """
+        Returns the GDAL configuration options needed to access the storage.
+        """
+        return {}
+
+    def fingerprint(self, uri: str) -> str:
+        """
+        Returns an identifier of the file's version,
+        that changes whenever the file is modified.
+        """
+        head = self.head(uri)
+        return f"{head.size}-{head.etag}"
+
+    def size(self, uri: str) -> int:
+        """
+        Returns the size of the file in bytes.
+        """
+        return self.head(uri).size
@@ -1,12 +1,52 @@
-from google.cloud.storage import Client
-from google.oauth2 import service_account
+from urllib.parse import urlparse
 
-from datacube.core.storage.drivers.abstract import AbstractStorage
+from fsspec import FSMap, get_mapper
+
+from datacube.core.storage.clients import (DEFAULT_POOL_SIZE,
+                                           get_gcs_client,
+                                           get_gcs_credentials)
+from datacube.core.storage.drivers.abstract import (AbstractStorage,
+                                                    StorageObject)
 
 
 class GCStorage(AbstractStorage):
+    NAME = "gs"
+    SCHEMES = ("gs",)
+
+    def __init__(self, api_key, pool_size: int = DEFAULT_POOL_SIZE):
+        self.api_key = api_key
+        # The client is shared by all the storages of the account
+        self.client = get_gcs_client(api_key, pool_size)
+
+    @classmethod
+    def from_conf(cls, conf: dict) -> "GCStorage":
+        return cls(conf["api_key"],
+                   int(conf.get("pool_size") or DEFAULT_POOL_SIZE))
+
+    def read_range(self, uri: str, start: int, length: int) -> bytes:
+        url = urlparse(uri)
+        return self.client.bucket(url.netloc).blob(url.path[1:]) \
+            .download_as_bytes(start=start, end=start + length - 1)
+
+    def head(self, uri: str) -> StorageObject:
+        url = urlparse(uri)
+        blob = self.client.bucket(url.netloc).get_blob(url.path[1:])
+        if blob is None:
+            raise FileNotFoundError(uri)
+        return StorageObject(uri=uri, size=blob.size, etag=blob.etag)
+
+    def list(self, uri: str) -> list[str]:
+        url = urlparse(uri)
+        return [f"gs://{url.netloc}/{blob.name}" for blob in
+                self.client.list_blobs(url.netloc, prefix=url.path[1:])]
+
+    def mapper(self, uri: str) -> FSMap:
+        return get_mapper(uri, token=get_gcs_credentials(self.api_key))
+
+    def gdal_path(self, uri: str) -> str:
+        url = urlparse(uri)
+        return f"/vsigs/{url.netloc}{url.path}"
 
-    def __init__(self, api_key):
-        credentials = service_account.Credentials.from_service_account_info(
-            api_key)
-        self.client = Client("DataCubeBuilder", credentials=credentials)
+    def gdal_env(self) -> dict[str, str]:
+        return {"GS_OAUTH2_PRIVATE_KEY": self.api_key["private_key"],
+                "GS_OAUTH2_CLIENT_EMAIL": self.api_key["client_email"]}
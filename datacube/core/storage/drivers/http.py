@@ -0,0 +1,57 @@
+from fsspec import FSMap, get_mapper
+
+from datacube.core.storage.clients import DEFAULT_POOL_SIZE, get_http_session
+from datacube.core.storage.drivers.abstract import (AbstractStorage,
+                                                    StorageObject)
+
+
+class HTTPStorage(AbstractStorage):
+    """
+    Files served over HTTP(S), read with range requests. They can be
+    neither listed nor written.
+    """
+    NAME = "http"
+    SCHEMES = ("http", "https")
+
+    def __init__(self, headers: dict[str, str] | None = None,
+                 pool_size: int = DEFAULT_POOL_SIZE):
+        self.headers = dict(headers or {})
+        # The session is shared by all the storages sending the headers
+        self.client = get_http_session(self.headers, pool_size)
+
+    @classmethod
+    def from_conf(cls, conf: dict) -> "HTTPStorage":
+        return cls(conf.get("headers"),
+                   int(conf.get("pool_size") or DEFAULT_POOL_SIZE))
+
+    def transport_params(self) -> dict:
+        return {"headers": self.headers, "session": self.client}
+
+    def read_range(self, uri: str, start: int, length: int) -> bytes:
+        response = self.client.get(uri, headers={
+            "Range": f"bytes={start}-{start + length - 1}"})
+        response.raise_for_status()
+        # The whole file is returned by servers ignoring ranges
+        if response.status_code != 206:
+            return response.content[start:start + length]
+        return response.content
+
+    def head(self, uri: str) -> StorageObject:
+        response = self.client.head(uri, allow_redirects=True)
+        response.raise_for_status()
+        return StorageObject(
+            uri=uri, size=int(response.headers["Content-Length"]),
+            etag=response.headers.get("ETag") or
+            response.headers.get("Last-Modified", ""))
+
+    def mapper(self, uri: str) -> FSMap:
+        return get_mapper(uri, headers=self.headers)
+
+    def gdal_path(self, uri: str) -> str:
+        return f"/vsicurl/{uri}"
+
+    def gdal_env(self) -> dict[str, str]:
+        if not self.headers:
+            return {}
+        return {"GDAL_HTTP_HEADERS": "\r\n".join(
+            f"{name}: {value}" for name, value in self.headers.items())}
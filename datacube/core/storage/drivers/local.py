@@ -1,7 +1,45 @@
-from datacube.core.storage.drivers.abstract import AbstractStorage
+import os
+
+from datacube.core.storage.drivers.abstract import (AbstractStorage,
+                                                    StorageObject)
+
+
+def _local_path(uri: str) -> str:
+    return uri.removeprefix("file://")
 
 
 class LocalStorage(AbstractStorage):
+    NAME = "local"
+    SCHEMES = ("", "file")
 
     def __init__(self):
         self.client = None
+
+    def transport_params(self) -> dict:
+        return {}
+
+    def read_range(self, uri: str, start: int, length: int) -> bytes:
+        with open(_local_path(uri), "rb") as fb:
+            fb.seek(start)
+            return fb.read(length)
+
+    def head(self, uri: str) -> StorageObject:
+        stat = os.stat(_local_path(uri))
+        return StorageObject(uri=uri, size=stat.st_size,
+                             etag=str(stat.st_mtime_ns))
+
+    def list(self, uri: str) -> list[str]:
+        prefix = _local_path(uri)
+        directory = prefix if os.path.isdir(prefix) \
+            else os.path.dirname(prefix) or "."
+        paths = (os.path.normpath(os.path.join(root, name))
+                 for root, _, names in os.walk(directory) for name in names)
+        return sorted(path for path in paths
+                      if path.startswith(os.path.normpath(prefix)))
+
+    def mapper(self, uri: str) -> str:
+        return _local_path(uri)
+
+    def gdal_path(self, uri: str) -> str:
+        # Relative paths can't be nested in GDAL's virtual file systems
+        return os.path.abspath(_local_path(uri))
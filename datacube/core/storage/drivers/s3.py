@@ -0,0 +1,78 @@
+from urllib.parse import urlparse
+
+from fsspec import FSMap, get_mapper
+
+from datacube.core.storage.clients import DEFAULT_POOL_SIZE, get_s3_client
+from datacube.core.storage.drivers.abstract import (AbstractStorage,
+                                                    StorageObject)
+
+
+class S3Storage(AbstractStorage):
+    """
+    S3 compatible object store, such as AWS S3 or MinIO
+    when 'endpoint_url' is set.
+    """
+    NAME = "s3"
+    SCHEMES = ("s3",)
+
+    def __init__(self, endpoint_url: str | None = None,
+                 region: str | None = None,
+                 access_key_id: str | None = None,
+                 secret_access_key: str | None = None,
+                 pool_size: int = DEFAULT_POOL_SIZE):
+        self.endpoint_url = endpoint_url
+        self.region = region
+        self.access_key_id = access_key_id
+        self.secret_access_key = secret_access_key
+        # The client is shared by all the storages of the access key
+        self.client = get_s3_client(endpoint_url, region, access_key_id,
+                                    secret_access_key, pool_size)
+
+    @classmethod
+    def from_conf(cls, conf: dict) -> "S3Storage":
+        return cls(conf.get("endpoint_url"), conf.get("region"),
+                   conf.get("access_key_id"), conf.get("secret_access_key"),
+                   int(conf.get("pool_size") or DEFAULT_POOL_SIZE))
+
+    def read_range(self, uri: str, start: int, length: int) -> bytes:
+        url = urlparse(uri)
+        return self.client.get_object(
+            Bucket=url.netloc, Key=url.path[1:],
+            Range=f"bytes={start}-{start + length - 1}")["Body"].read()
+
+    def head(self, uri: str) -> StorageObject:
+        url = urlparse(uri)
+        head = self.client.head_object(Bucket=url.netloc, Key=url.path[1:])
+        return StorageObject(uri=uri, size=head["ContentLength"],
+                             etag=head["ETag"].strip('"'))
+
+    def list(self, uri: str) -> list[str]:
+        url = urlparse(uri)
+        pages = self.client.get_paginator("list_objects_v2").paginate(
+            Bucket=url.netloc, Prefix=url.path[1:])
+        return [f"s3://{url.netloc}/{content['Key']}"
+                for page in pages for content in page.get("Contents", [])]
+
+    def mapper(self, uri: str) -> FSMap:
+        return get_mapper(uri, key=self.access_key_id,
+                          secret=self.secret_access_key,
+                          client_kwargs={"endpoint_url": self.endpoint_url,
+                                         "region_name": self.region})
+
+    def gdal_path(self, uri: str) -> str:
+        url = urlparse(uri)
+        return f"/vsis3/{url.netloc}{url.path}"
+
+    def gdal_env(self) -> dict[str, str]:
+        env = {}
+        if self.access_key_id:
+            env["AWS_ACCESS_KEY_ID"] = self.access_key_id
+            env["AWS_SECRET_ACCESS_KEY"] = self.secret_access_key
+        if self.region:
+            env["AWS_REGION"] = self.region
+        if self.endpoint_url:
+            endpoint = urlparse(self.endpoint_url)
+            env["AWS_S3_ENDPOINT"] = endpoint.netloc
+            env["AWS_HTTPS"] = "YES" if endpoint.scheme == "https" else "NO"
+            env["AWS_VIRTUAL_HOSTING"] = "FALSE"
+        return env
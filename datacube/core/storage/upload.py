@@ -0,0 +1,101 @@
+import os
+import shutil
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+
+from fsspec import FSMap
+
+from datacube.core.logging.logger import CustomLogger as Logger
+from datacube.core.storage.utils import get_upload_conf
+
+LOGGER = Logger.get_logger()
+
+# Metadata of the root group of a zarr, uploaded last in this order
+ZARR_ROOT_METADATA = (".zgroup", ".zattrs", ".zmetadata")
+
+
+def _put_file(store: FSMap, local_path: str, key: str, retries: int,
+              backoff: float):
+    """
+    Uploads the file to the key of the store, retrying with an
+    exponential backoff if it fails.
+    """
+    for attempt in range(retries + 1):
+        try:
+            store.fs.put_file(local_path, f"{store.root}/{key}")
+            return
+        except Exception as e:
+            if attempt == retries:
+                raise e
+            delay = backoff * 2 ** attempt
+            LOGGER.warning(f"Upload of {key} failed ({e}), " +
+                           f"retrying in {delay}s")
+            time.sleep(delay)
+
+
+def upload_zarr(local_path: str, store: FSMap):
+    """
+    Uploads the zarr written in 'local_path' to the store, replacing its
+    content. The files of the arrays are uploaded concurrently, then the
+    metadata of the root group, so that readers never open a zarr
+    partially uploaded. The files of a previous zarr in the store are
+    overwritten in place, and those left are removed last: a failed upload
+    can leave a mix of the files of both zarrs.
+    """
+    conf = get_upload_conf()
+    keys = [Path(root, name).relative_to(local_path).as_posix()
+            for root, _, names in os.walk(local_path) for name in names]
+    root_metadata = [key for key in ZARR_ROOT_METADATA if key in keys]
+    array_keys = [key for key in keys if key not in root_metadata]
+
+    def put(key: str):
+        _put_file(store, os.path.join(local_path, *key.split("/")), key,
+                  conf["retries"], conf["backoff"])
+
+    LOGGER.info(f"Uploading {len(keys)} files " +
+                f"with {conf['workers']} workers")
+    executor = ThreadPoolExecutor(max_workers=conf["workers"],
+                                  thread_name_prefix="dc3-upload")
+    try:
+        futures = [executor.submit(put, key) for key in array_keys]
+        for future in as_completed(futures):
+            future.result()
+    finally:
+        # The uploads not started yet are cancelled if one failed
+        executor.shutdown(cancel_futures=True)
+    for key in root_metadata:
+        put(key)
+
+    stale_keys = set(store.keys()) - set(keys)
+    if stale_keys:
+        LOGGER.info(f"Removing {len(stale_keys)} files of the previous " +
+                    "datacube")
+        store.delitems(list(stale_keys))
+
+
+def move_zarr(local_path: str, output_path: str):
+    """
+    Moves the zarr written in 'local_path' to 'output_path' of a local
+    storage, replacing the zarr there. It is first moved next to it, then
+    swapped with the previous zarr by renamings, so that a failed move
+    leaves the previous zarr whole.
+    """
+    parent, name = os.path.split(os.path.abspath(output_path))
+    os.makedirs(parent, exist_ok=True)
+    work_dir = tempfile.mkdtemp(prefix=f".{name}.", dir=parent)
+    try:
+        staged, previous = (os.path.join(work_dir, "staged"),
+                            os.path.join(work_dir, "previous"))
+        shutil.move(local_path, staged)
+        if os.path.exists(output_path):
+            os.rename(output_path, previous)
+        try:
+            os.rename(staged, output_path)
+        except Exception:
+            if os.path.exists(previous):
+                os.rename(previous, output_path)
+            raise
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
@@ -1,38 +1,139 @@
+from contextlib import contextmanager
+from importlib.metadata import entry_points
 from os.path import join
 from pathlib import Path
+from typing import IO, Iterator, Type
 
-import smart_open as so
 from envyaml import EnvYAML
-from fsspec import FSMap, get_mapper
+from fsspec import FSMap
 
+from datacube.core.geo.xarray import DEFAULT_CHUNK_BYTES
+from datacube.core.models.request.compression import Compression
 from datacube.core.storage.drivers.abstract import AbstractStorage
 from datacube.core.storage.drivers.gcs import GCStorage
+from datacube.core.storage.drivers.http import HTTPStorage
 from datacube.core.storage.drivers.local import LocalStorage
+from datacube.core.storage.drivers.s3 import S3Storage
 
 ROOT_PATH = str(Path(__file__).parent.parent.parent.parent)
 INPUT_STORAGE = EnvYAML(join(ROOT_PATH, "configs/app.conf.yml"))["input"]
 OUTPUT_STORAGE = EnvYAML(join(ROOT_PATH, "configs/app.conf.yml"))["output"]
 
+DEFAULT_ARCHIVE_CACHE_DIR = "archive_cache"
+DEFAULT_ARCHIVE_CACHE_SIZE = 10 * 1024 ** 3  # 10 GB
+DEFAULT_UPLOAD_WORKERS = 16
+DEFAULT_UPLOAD_RETRIES = 5
+DEFAULT_UPLOAD_BACKOFF = 1  # seconds
+
+# Storage drivers by scheme of the URIs of their files
+STORAGE_DRIVERS: dict[str, Type[AbstractStorage]] = {}
+# Entry point group of the storage drivers provided by other packages
+STORAGE_DRIVERS_GROUP = "dc3.storage"
+
+
+def register_storage_driver(driver: Type[AbstractStorage]):
+    """
+    Registers the storage driver for the schemes of its URIs,
+    in place of the driver previously registered for them.
+    """
+    for scheme in driver.SCHEMES:
+        STORAGE_DRIVERS[scheme] = driver
+
+
+for driver in (LocalStorage, GCStorage, S3Storage, HTTPStorage):
+    register_storage_driver(driver)
+for entry_point in entry_points(group=STORAGE_DRIVERS_GROUP):
+    register_storage_driver(entry_point.load())
+
+
+def get_storage_driver(scheme: str) -> Type[AbstractStorage]:
+    if scheme not in STORAGE_DRIVERS:
+        raise NotImplementedError(f"Storage '{scheme}' not implemented")
+    return STORAGE_DRIVERS[scheme]
+
 
 def create_input_storage(storage_type) -> AbstractStorage:
-    if not storage_type:
-        return LocalStorage()
-    if storage_type == "gs":
-        return GCStorage(INPUT_STORAGE["gs"]["api_key"])
-    else:
-        raise NotImplementedError(
-            f"Storage '{storage_type}' not implemented")
+    """
+    Creates the storage of the URIs of scheme 'storage_type', configured
+    by its section of the input configuration.
+    """
+    driver = get_storage_driver(storage_type or "")
+    return driver.from_conf(INPUT_STORAGE.get(driver.NAME) or {})
+
+
+def _get_output_driver() -> Type[AbstractStorage]:
+    for driver in STORAGE_DRIVERS.values():
+        if driver.NAME == OUTPUT_STORAGE["storage"]:
+            return driver
+    raise NotImplementedError(
+        f"Output storage {OUTPUT_STORAGE['storage']} not implemented")
+
+
+def create_output_storage() -> AbstractStorage:
+    """
+    Creates the configured output storage.
+    """
+    driver = _get_output_driver()
+    return driver.from_conf(OUTPUT_STORAGE.get(driver.NAME) or {})
 
 
 def get_local_root_directory() -> str:
     return INPUT_STORAGE["local"]["root_directory"]
 
 
+def get_archive_cache_conf() -> dict[str, str | int]:
+    """
+    Returns the directory and the maximum size in bytes of the cache
+    of files extracted from the raster archives.
+    """
+    conf = INPUT_STORAGE.get("cache") or {}
+    return {"directory": conf.get("directory") or DEFAULT_ARCHIVE_CACHE_DIR,
+            "max_size": int(conf.get("max_size")
+                            or DEFAULT_ARCHIVE_CACHE_SIZE)}
+
+
+def use_virtual_file_system() -> bool:
+    """
+    Whether the band files are read in place through GDAL's virtual
+    file systems, instead of being extracted from their archive.
+    """
+    return bool(INPUT_STORAGE.get("virtual_file_system", False))
+
+
+def get_output_compression() -> Compression | None:
+    """
+    Returns the default compression of the datacubes written to the output
+    storage, None to use the defaults of zarr.
+    """
+    conf = OUTPUT_STORAGE.get("compression")
+    return Compression(**conf) if conf else None
+
+
+def get_output_chunk_size() -> int:
+    """
+    Returns the target size in bytes of the chunks of the datacubes.
+    """
+    return int(OUTPUT_STORAGE.get("chunk_size") or DEFAULT_CHUNK_BYTES)
+
+
+def get_upload_conf() -> dict[str, int | float]:
+    """
+    Returns the number of files uploaded concurrently to the output
+    object store, the number of retries of each file, and the delay in
+    seconds before its first retry, doubled at each retry.
+    """
+    conf = OUTPUT_STORAGE.get("upload") or {}
+    return {"workers": int(conf.get("workers") or DEFAULT_UPLOAD_WORKERS),
+            "retries": int(conf.get("retries", DEFAULT_UPLOAD_RETRIES)),
+            "backoff": float(conf.get("backoff", DEFAULT_UPLOAD_BACKOFF))}
+
+
 def get_full_adress(destination) -> str:
     if is_output_storage_local():
         return join(OUTPUT_STORAGE["local"]["directory"], destination)
-    elif is_output_storage_gs():
-        return f"gs://{OUTPUT_STORAGE['gs']['bucket']}/{destination}"
+    driver = _get_output_driver()
+    return f"{driver.SCHEMES[0]}://{OUTPUT_STORAGE[driver.NAME]['bucket']}" \
+        + f"/{destination}"
 
 
 def get_mapper_output(destination) -> tuple[str, FSMap] | tuple[str, str]:
@@ -41,36 +142,30 @@ def get_mapper_output(destination) -> tuple[str, FSMap] | tuple[str, str]:
     will be uploaded, as well as the mapping to write it.
     In the case of local storage, the mapping is the adress.
     """
-    if is_output_storage_local():
-        path = get_full_adress(destination)
-        return path, path
-    elif is_output_storage_gs():
-        url = get_full_adress(destination)
-        return url, get_mapper(url, mode="w",
-                               token=OUTPUT_STORAGE["gs"]["api_key"])
+    url = get_full_adress(destination)
+    return url, create_output_storage().mapper(url)
+
+
+@contextmanager
+def open_output(destination: str) -> Iterator[tuple[str, IO[bytes]]]:
+    """
+    Opens a stream writing to the configured storage, yielding its location
+    and the stream. Object stores receive the data in parts as it is
+    written, without holding the whole file in memory.
+    """
+    path = get_full_adress(destination)
+    with create_output_storage().open(path, "wb") as fb:
+        yield path, fb
 
 
 def write_bytes(destination: str, data: bytes) -> str:
     """
     Writes bytes data to the configured storage, and returns its location.
     """
-    path = get_full_adress(destination)
-    if is_output_storage_local():
-        client = None
-    elif is_output_storage_gs():
-        client = GCStorage(OUTPUT_STORAGE["gs"]["api_key"]).client
-    else:
-        raise NotImplementedError(
-            f"Output storage {OUTPUT_STORAGE['storage']} not implemented")
-
-    with so.open(path, "wb", transport_params={"client": client}) as fb:
+    with open_output(destination) as (path, fb):
         fb.write(data)
         return path
 
 
 def is_output_storage_local() -> bool:
     return OUTPUT_STORAGE["storage"] == "local"
-
-
-def is_output_storage_gs() -> bool:
-    return OUTPUT_STORAGE["storage"] == "gs"
@@ -1,10 +1,11 @@
-import re
-from typing import Match, Type
+from typing import Type
 
+import xarray as xr
+
+from datacube.core.expression import compile_expression
 from datacube.core.models.exception import BadRequest
 from datacube.core.models.request.cubeBuild import ExtendedCubeBuildRequest
-from datacube.core.models.request.rasterProductType import (AliasedRasterType,
-                                                            RasterType)
+from datacube.core.models.request.rasterProductType import RasterType
 from datacube.core.rasters.drivers import (AbstractRasterArchive,
                                            Sentinel1_Level1_Safe,
                                            Sentinel1_Theia,
@@ -17,7 +18,8 @@ def get_product_bands(request: ExtendedCubeBuildRequest,
                       product_type: RasterType) -> dict[str, str]:
     """
     Based on the request, creates a dictionnary with the pair
-    (datacube name, band name) as (key, value)
+    (datacube name, band name) as (key, value), for the bands of the
+    product referenced by the expressions of the requested bands only
     """
     # Extract from the request which bands are required
     alias_product = ""
@@ -28,31 +30,33 @@ def get_product_bands(request: ExtendedCubeBuildRequest,
     if alias_product == "":
         raise Exception(f"No alias given for product type {product_type}")
 
-    product_bands = {}
+    aliases = tuple(alias.alias for alias in request.aliases)
+    product_bands = set()
     for band in request.bands:
-        # Extract the bands required from the expression
-        match = re.findall(rf'{alias_product}\.([a-zA-Z0-9]*)',
-                           band.expression)
-        for m in match:
-            product_bands[f'{alias_product}.{m}'] = m
+        product_bands |= compile_expression(
+            band.expression, aliases).product_bands_of(alias_product)
 
-    return product_bands
+    return {f"{alias_product}.{product_band}": product_band
+            for product_band in sorted(product_bands)}
 
 
-def get_eval_formula(band_expression: str,
-                     aliases: list[AliasedRasterType]) -> str:
+def compute_bands(datacube: xr.Dataset,
+                  request: ExtendedCubeBuildRequest) -> xr.Dataset:
     """
-    Transform the requested expression of the band in a xarray operation
+    Computes the bands requested from the product bands of the datacube,
+    and keeps only them. The subterms shared by the expressions of the
+    bands are computed once.
     """
-    def repl(match: Match[str]) -> str:
-        for m in match.groups():
-            return f"datacube.get('{m}')"
-
-    result = band_expression
-    for alias in map(lambda a: a.alias, aliases):
-        result = re.sub(rf"({alias}\.[a-zA-Z0-9]*)", repl, result)
+    aliases = tuple(alias.alias for alias in request.aliases)
+    cache = {}
+    bands = {}
+    for band in request.bands:
+        bands[band.name] = compile_expression(
+            band.expression, aliases).evaluate(datacube, cache)
+        if band.min is not None and band.max is not None:
+            bands[band.name] = bands[band.name].clip(band.min, band.max)
 
-    return result
+    return datacube.assign(bands)[list(bands)]
 
 
 def get_raster_driver(raster_product_type: RasterType) \
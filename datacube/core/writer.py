@@ -0,0 +1,199 @@
+import shutil
+import traceback
+
+import dask.array as da
+import numpy as np
+import xarray as xr
+import zarr
+from fsspec import FSMap
+
+from datacube.core.cache.build_manifest import BuildManifest
+from datacube.core.geo.xarray import get_chunk_shape
+from datacube.core.logging.logger import CustomLogger as Logger
+from datacube.core.models.exception import UploadError
+from datacube.core.models.request.cubeBuild import ExtendedCubeBuildRequest
+from datacube.core.utils import compute_bands
+
+LOGGER = Logger.get_logger()
+
+
+class SliceWriter:
+    """
+    Writes the time slices of a datacube to its zarr as they are mosaicked,
+    instead of merging the whole datacube before writing it.
+
+    The zarr is preallocated for all the timestamps of the request when the
+    first slice is added. A chunk of the datacube along t is written once
+    all of its slices are ready, so that each chunk is written only once,
+    the slices waiting in the temporary directory until then. The chunks
+    already written are kept if the build fails.
+
+    The slices waiting and the chunks written are recorded in the manifest
+    of the build, for it to resume without writing them again.
+
+    When the first 'offset' time slices are already in the zarr, it is
+    resized along t instead, keeping its chunks. The time slices after them
+    are left by an update that failed, and are replaced.
+    """
+
+    def __init__(self, request: ExtendedCubeBuildRequest,
+                 store: FSMap | str, timestamps: list[int], chunk_size: int,
+                 manifest: BuildManifest, offset: int = 0):
+        self.request = request
+        self.store = store
+        self.timestamps = sorted(set(timestamps))
+        self.chunk_size = chunk_size
+        self.manifest = manifest
+        self.offset = offset
+
+    def add(self, timestamp: int, slice_path: str):
+        """
+        Adds the zarr of the time slice, writing the chunks of the datacube
+        that are complete. The zarr of the slice is removed once written.
+        """
+        self.manifest.slices[timestamp] = slice_path
+        self.manifest.save()
+        self.__flush()
+
+    def close(self):
+        """
+        Writes the chunks left by a previous run of the build, then checks
+        that all the time slices have been written.
+        """
+        self.__flush()
+        written = len(self.manifest.written)
+        if written != len(self.timestamps):
+            raise UploadError(
+                detail=f"Datacube: {written} time slice(s) written " +
+                       f"out of {len(self.timestamps)}")
+
+    def write_attrs(self, datacube: xr.Dataset):
+        """
+        Writes the attributes of the datacube and of its bands to its zarr.
+        """
+        try:
+            group = zarr.open_group(self.store, mode="r+")
+            group.attrs.update(datacube.attrs)
+            for name, band in datacube.data_vars.items():
+                group[name].attrs.update(band.attrs)
+            zarr.consolidate_metadata(self.store)
+        except Exception as e:
+            LOGGER.error(e)
+            traceback.print_exc()
+            raise UploadError(detail=f"Datacube: {e.args[0]}")
+
+    def __flush(self):
+        """
+        Writes the chunks of the datacube whose slices are all ready,
+        preallocating the datacube first if needed.
+        """
+        pending = self.manifest.slices
+        if not pending:
+            return
+        if self.manifest.chunk_shape is None and self.offset > 0:
+            self.__extend()
+        elif self.manifest.chunk_shape is None:
+            with xr.open_zarr(next(iter(pending.values()))) as dataset:
+                self.__create(compute_bands(dataset, self.request))
+
+        # The slices are grouped by the chunk of the zarr they belong to
+        chunk_t = self.manifest.chunk_shape["t"]
+        end = self.offset + len(self.timestamps)
+        for chunk_start in range(self.offset // chunk_t * chunk_t, end,
+                                 chunk_t):
+            start = max(chunk_start, self.offset)
+            chunk_timestamps = self.timestamps[
+                start - self.offset:min(chunk_start + chunk_t, end)
+                - self.offset]
+            if all(t in pending for t in chunk_timestamps):
+                self.__write_chunk(start, chunk_timestamps)
+
+    def __create(self, bands: xr.Dataset):
+        """
+        Preallocates the zarr of the datacube, without writing its bands.
+        """
+        encoding = {}
+        itemsize = 0
+        for band in self.request.bands:
+            band_encoding = band.encoding(bands[band.name].dtype)
+            if band_encoding:
+                encoding[band.name] = band_encoding
+            itemsize = max(itemsize, band.stored_dtype(
+                bands[band.name].dtype).itemsize)
+
+        # Chunk the datacube for the size of the values as they are stored
+        dims = {"x": bands.sizes["x"], "y": bands.sizes["y"],
+                "t": len(self.timestamps)}
+        chunk_shape = get_chunk_shape(
+            dims, self.request.chunking_strategy, itemsize, self.chunk_size)
+        shape = tuple(dims.values())
+        chunks = tuple(chunk_shape.values())
+
+        template = xr.Dataset(
+            {band.name: (("x", "y", "t"), da.zeros(
+                shape, chunks=chunks, dtype=bands[band.name].dtype))
+             for band in self.request.bands},
+            coords={"x": bands.x.values, "y": bands.y.values,
+                    "t": np.array(self.timestamps)})
+
+        LOGGER.info("Preallocating the datacube in storage")
+        try:
+            template.to_zarr(self.store, mode="w", encoding=encoding,
+                             compute=False)
+        except Exception as e:
+            LOGGER.error(e)
+            traceback.print_exc()
+            raise UploadError(detail=f"Datacube: {e.args[0]}")
+        self.manifest.chunk_shape = chunk_shape
+        self.manifest.save()
+
+    def __extend(self):
+        """
+        Resizes the zarr of the datacube along t for the new time slices,
+        without writing their bands.
+        """
+        LOGGER.info("Extending the datacube in storage")
+        try:
+            group = zarr.open_group(self.store, mode="r+")
+            size = self.offset + len(self.timestamps)
+            for band in self.request.bands:
+                group[band.name].resize(*group[band.name].shape[:2], size)
+            group["t"].resize(size)
+            group["t"][self.offset:] = self.timestamps
+            chunks = group[self.request.bands[0].name].chunks
+            zarr.consolidate_metadata(self.store)
+        except Exception as e:
+            LOGGER.error(e)
+            traceback.print_exc()
+            raise UploadError(detail=f"Datacube: {e.args[0]}")
+        self.manifest.chunk_shape = dict(zip(["x", "y", "t"], chunks))
+        self.manifest.save()
+
+    def __write_chunk(self, start: int, chunk_timestamps: list[int]):
+        slice_paths = [self.manifest.slices[t] for t in chunk_timestamps]
+        datacube = xr.concat([xr.open_zarr(p) for p in slice_paths],
+                             dim="t", combine_attrs="override")
+        datacube = compute_bands(datacube, self.request) \
+            .drop_vars(["x", "y"]) \
+            .chunk({**self.manifest.chunk_shape,
+                    "t": len(chunk_timestamps)})
+
+        LOGGER.info(f"Writing time slices {start} to " +
+                    f"{start + len(chunk_timestamps) - 1} to storage")
+        try:
+            # The first chunk appended to a datacube may be partial, written
+            # by a single dask chunk
+            datacube.to_zarr(self.store, region={
+                "t": slice(start, start + len(chunk_timestamps))},
+                safe_chunks=start % self.manifest.chunk_shape["t"] == 0)
+        except Exception as e:
+            LOGGER.error(e)
+            traceback.print_exc()
+            raise UploadError(detail=f"Datacube: {e.args[0]}")
+
+        for t in chunk_timestamps:
+            self.manifest.slices.pop(t)
+        self.manifest.written.extend(chunk_timestamps)
+        self.manifest.save()
+        for slice_path in slice_paths:
+            shutil.rmtree(slice_path, ignore_errors=True)
@@ -1,8 +1,16 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from threading import BoundedSemaphore
+from typing import Any, Callable
+
 from fastapi import APIRouter
 import fastapi
 
 from datacube.core.build_cube import build_datacube
+from datacube.core.estimate_cube import estimate_datacube
+from datacube.core.models.cubeBuildEstimate import CubeBuildEstimate
 from datacube.core.models.cubeBuildResult import CubeBuildResult
+from datacube.core.models.exception import TooManyRequests
 from datacube.core.models.request.cubeBuild import (CubeBuildRequest,
                                                     ExtendedCubeBuildRequest)
 from datacube.rest.models.restException import RESTException
@@ -10,10 +18,47 @@ from datacube.rest.server.server_configuration import ServerConfiguration
 
 ROUTER = APIRouter()
 
+# Builds are run outside of the event loop, in a bounded executor
+MAX_BUILDS = ServerConfiguration.get_max_builds()
+BUILD_EXECUTOR = ThreadPoolExecutor(max_workers=MAX_BUILDS,
+                                    thread_name_prefix="dc3-build")
+BUILD_SLOTS = BoundedSemaphore(MAX_BUILDS)
+
+
+async def run_build(method: Callable[[Any], Any], input: Any) -> Any:
+    """
+    Runs the build in the build executor if a slot is free,
+    and fails with a TooManyRequests error otherwise.
+    """
+    if not BUILD_SLOTS.acquire(blocking=False):
+        raise TooManyRequests(
+            title="Too many cubes being built",
+            detail=f"At most {MAX_BUILDS} cube(s) can be built at the " +
+                   "same time. Retry later or use the asynchronous " +
+                   "execution of the 'dc3-builder' process.")
+    try:
+        return await asyncio.get_running_loop().run_in_executor(
+            BUILD_EXECUTOR, method, input)
+    finally:
+        BUILD_SLOTS.release()
+
+
+def run_queued_build(method: Callable[[Any], Any], input: Any) -> Any:
+    """
+    Runs the build in the build executor once a slot is free, blocking
+    the calling thread until it is done. Used by the asynchronous jobs,
+    which wait for their turn instead of being rejected.
+    """
+    with BUILD_SLOTS:
+        return BUILD_EXECUTOR.submit(method, input).result()
+
 
 def build_datacube_wrapper(request: CubeBuildRequest) -> CubeBuildResult:
     return build_datacube(ExtendedCubeBuildRequest(
-        request, ServerConfiguration.is_pivot_format()))
+        request, ServerConfiguration.is_pivot_format(),
+        ServerConfiguration.get_reprojection_memory(),
+        ServerConfiguration.get_band_workers(),
+        ServerConfiguration.is_resumable()))
 
 
 @ROUTER.post("/cube/build",
@@ -28,9 +73,43 @@ def build_datacube_wrapper(request: CubeBuildRequest) -> CubeBuildResult:
                 fastapi.status.HTTP_422_UNPROCESSABLE_ENTITY: {
                     'model': RESTException
                 },
+                fastapi.status.HTTP_429_TOO_MANY_REQUESTS: {
+                    'model': RESTException
+                },
                 fastapi.status.HTTP_500_INTERNAL_SERVER_ERROR: {
                     'model': RESTException
                 }
              })
 async def cube_build(request: CubeBuildRequest):
-    return build_datacube_wrapper(request)
+    return await run_build(build_datacube_wrapper, request)
+
+
+def estimate_datacube_wrapper(request: CubeBuildRequest) \
+        -> CubeBuildEstimate:
+    return estimate_datacube(ExtendedCubeBuildRequest(
+        request, ServerConfiguration.is_pivot_format()))
+
+
+@ROUTER.post("/cube/estimate",
+             responses={
+                fastapi.status.HTTP_200_OK: {
+                    'model': CubeBuildEstimate
+                },
+                fastapi.status.HTTP_400_BAD_REQUEST: {
+                    'model': RESTException
+                },
+                fastapi.status.HTTP_422_UNPROCESSABLE_ENTITY: {
+                    'model': RESTException
+                },
+                fastapi.status.HTTP_500_INTERNAL_SERVER_ERROR: {
+                    'model': RESTException
+                }
+             })
+async def cube_estimate(request: CubeBuildRequest):
+    """
+    Estimates the size of the datacube and the bytes to download,
+    from the metadata of the rasters only, without building it.
+    """
+    # Estimations only read metadata, so they don't take a build slot
+    return await asyncio.get_running_loop().run_in_executor(
+        None, estimate_datacube_wrapper, request)
@@ -15,6 +15,7 @@ def get_conformance() -> Conforms:
             f"{ROOT_CONFORMANCE}/core",
             f"{ROOT_CONFORMANCE}/ogc-process-description",
             f"{ROOT_CONFORMANCE}/job-list",
+            f"{ROOT_CONFORMANCE}/dismiss",
             f"{ROOT_CONFORMANCE}/json",
             f"{ROOT_CONFORMANCE}/oas30",
         ]
@@ -2,47 +2,85 @@ from fastapi import APIRouter, status
 
 from datacube.core.models.exception import AbstractException as OGCException
 from datacube.rest.models.restException import RESTException
-from datacube.rest.ogc.models import ExceptionType, StatusInfo
+from datacube.rest.ogc.job_manager import JobManager
+from datacube.rest.ogc.models import ExceptionType, JobList, Link, StatusInfo
+from datacube.rest.ogc.models.enums import StatusCode
 from datacube.rest.ogc.models.execute import InlineOrRefData
+from datacube.rest.server.server_configuration import ServerConfiguration
 
 ROUTER = APIRouter()
 
 
+def add_job_links(job: StatusInfo) -> StatusInfo:
+    """
+    Adds to the status of a job the links to itself and to its results.
+    """
+    job_root = f"{ServerConfiguration.get_server_root()}/jobs/{job.jobID}"
+    job.links = [Link(href=job_root, rel="self", type="application/json",
+                      title="Status of the job")]
+    if job.status == StatusCode.successful:
+        job.links.append(Link(
+            href=f"{job_root}/results",
+            rel="http://www.opengis.net/def/rel/ogc/1.0/results",
+            type="application/json", title="Results of the job"))
+    return job
+
+
+def __get_existing_job(jobId: str) -> StatusInfo:
+    job = JobManager.get_job(jobId)
+    if job is None:
+        raise OGCException(type=ExceptionType.NO_SUCH_JOB.value,
+                           status=status.HTTP_404_NOT_FOUND,
+                           detail=f"'{jobId}' is not a valid job id.")
+    return job
+
+
 @ROUTER.get("/jobs",
+            response_model=JobList,
             response_model_exclude_none=True)
-def get_jobs():
-    raise OGCException(type=ExceptionType.NOT_IMPLEMENTED.value,
-                       status=status.HTTP_501_NOT_IMPLEMENTED)
+def get_jobs() -> JobList:
+    return JobList(
+        jobs=[add_job_links(job) for job in JobManager.get_jobs()],
+        links=[Link(href=f"{ServerConfiguration.get_server_root()}/jobs",
+                    rel="self", type="application/json",
+                    title="List of the jobs")])
 
 
 @ROUTER.get("/jobs/{jobId}",
+            response_model=StatusInfo,
             response_model_exclude_none=True,
             responses={
                 status.HTTP_200_OK: {
                     'model': StatusInfo
                     },
+                status.HTTP_404_NOT_FOUND: {
+                    'model': RESTException
+                },
                 status.HTTP_422_UNPROCESSABLE_ENTITY: {
                     'model': RESTException
                 }
             })
-def get_job(jobId: str):
-    raise OGCException(type=ExceptionType.NOT_IMPLEMENTED.value,
-                       status=status.HTTP_501_NOT_IMPLEMENTED)
+def get_job(jobId: str) -> StatusInfo:
+    return add_job_links(__get_existing_job(jobId))
 
 
 @ROUTER.delete("/jobs/{jobId}",
+               response_model=StatusInfo,
                response_model_exclude_none=True,
                responses={
                 status.HTTP_200_OK: {
                     'model': StatusInfo
                     },
+                status.HTTP_404_NOT_FOUND: {
+                    'model': RESTException
+                },
                 status.HTTP_422_UNPROCESSABLE_ENTITY: {
                     'model': RESTException
                 }
                })
-def delete_job(jobId: str):
-    raise OGCException(type=ExceptionType.NOT_IMPLEMENTED.value,
-                       status=status.HTTP_501_NOT_IMPLEMENTED)
+def delete_job(jobId: str) -> StatusInfo:
+    __get_existing_job(jobId)
+    return add_job_links(JobManager.dismiss(jobId))
 
 
 @ROUTER.get("/jobs/{jobId}/results",
@@ -51,10 +89,24 @@ def delete_job(jobId: str):
                 status.HTTP_200_OK: {
                     'model': dict[str, InlineOrRefData]
                     },
+                status.HTTP_404_NOT_FOUND: {
+                    'model': RESTException
+                },
                 status.HTTP_422_UNPROCESSABLE_ENTITY: {
                     'model': RESTException
                 }
             })
 def get_job_result(jobId: str):
-    raise OGCException(type=ExceptionType.NOT_IMPLEMENTED.value,
-                       status=status.HTTP_501_NOT_IMPLEMENTED)
+    job = __get_existing_job(jobId)
+    if job.status == StatusCode.failed:
+        raise OGCException(type=ExceptionType.SERVER_ERROR.value,
+                           status=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                           title=f"Job '{jobId}' failed",
+                           detail=job.message)
+
+    result = JobManager.get_result(jobId)
+    if result is None:
+        raise OGCException(type=ExceptionType.RESULT_NOT_READY.value,
+                           status=status.HTTP_404_NOT_FOUND,
+                           detail=f"Job '{jobId}' is {job.status.value}.")
+    return result
@@ -0,0 +1,186 @@
+import json
+import sqlite3
+import traceback
+import uuid
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import closing, contextmanager
+from datetime import datetime
+from typing import Any, Callable, Iterator
+
+from pydantic import BaseModel
+
+from datacube.core.logging.logger import CustomLogger as Logger
+from datacube.core.models.exception import AbstractException
+from datacube.rest.ogc.models import StatusInfo
+from datacube.rest.ogc.models.enums import JobType, StatusCode
+
+LOGGER = Logger.get_logger()
+
+CREATE_JOBS_TABLE = """
+    CREATE TABLE IF NOT EXISTS jobs (
+        job_id TEXT PRIMARY KEY,
+        process_id TEXT NOT NULL,
+        status TEXT NOT NULL,
+        message TEXT,
+        created TEXT,
+        started TEXT,
+        finished TEXT,
+        updated TEXT,
+        result TEXT
+    )"""
+JOB_COLUMNS = "job_id, process_id, status, message, " + \
+              "created, started, finished, updated"
+
+
+def _now() -> str:
+    return datetime.utcnow().isoformat()
+
+
+class JobManager:
+    """
+    Executes OGC jobs asynchronously in a pool of workers, and keeps
+    track of their status and results in a SQLite database.
+    """
+    __store: str = None
+    __executor: ThreadPoolExecutor = None
+    __futures: dict[str, Future] = {}
+
+    @classmethod
+    def init(cls, store: str, workers: int):
+        """
+        Creates the job store if needed and starts the pool of workers.
+        Jobs left unfinished by a previous run of the service are failed.
+        """
+        cls.__store = store
+        with cls.__connect() as connection:
+            connection.execute(CREATE_JOBS_TABLE)
+            connection.execute(
+                "UPDATE jobs SET status = ?, message = ?, updated = ? " +
+                "WHERE status IN (?, ?)",
+                (StatusCode.failed.value, "Interrupted by a service restart",
+                 _now(), StatusCode.accepted.value, StatusCode.running.value))
+        cls.__executor = ThreadPoolExecutor(max_workers=workers,
+                                            thread_name_prefix="dc3-job")
+
+    @classmethod
+    def submit(cls, process_id: str,
+               method: Callable[[Any], BaseModel], input: Any) -> StatusInfo:
+        """
+        Registers a new job and queues the execution of 'method' on 'input'.
+        """
+        job_id = str(uuid.uuid4())
+        now = _now()
+        with cls.__connect() as connection:
+            connection.execute(
+                "INSERT INTO jobs (job_id, process_id, status, " +
+                "created, updated) VALUES (?, ?, ?, ?, ?)",
+                (job_id, process_id, StatusCode.accepted.value, now, now))
+
+        cls.__futures[job_id] = cls.__executor.submit(
+            cls.__run, job_id, method, input)
+        return cls.get_job(job_id)
+
+    @classmethod
+    def __run(cls, job_id: str, method: Callable[[Any], BaseModel],
+              input: Any):
+        now = _now()
+        with cls.__connect() as connection:
+            connection.execute(
+                "UPDATE jobs SET status = ?, started = ?, updated = ? " +
+                "WHERE job_id = ? AND status = ?",
+                (StatusCode.running.value, now, now,
+                 job_id, StatusCode.accepted.value))
+
+        status, message, result = StatusCode.successful, None, None
+        try:
+            result = method(input).json(exclude_none=True)
+        except Exception as e:
+            LOGGER.error(f"[job-{job_id}] {e}")
+            traceback.print_exc()
+            status = StatusCode.failed
+            if isinstance(e, AbstractException):
+                message = f"{e.title}: {e.detail}" if e.title else e.detail
+            else:
+                message = str(e)
+        finally:
+            cls.__futures.pop(job_id, None)
+
+        # A dismissed job keeps its status and does not expose results
+        now = _now()
+        with cls.__connect() as connection:
+            connection.execute(
+                "UPDATE jobs SET status = ?, message = ?, result = ?, " +
+                "finished = ?, updated = ? WHERE job_id = ? AND status != ?",
+                (status.value, message, result, now, now,
+                 job_id, StatusCode.dismissed.value))
+
+    @classmethod
+    def get_jobs(cls) -> list[StatusInfo]:
+        with cls.__connect() as connection:
+            rows = connection.execute(
+                f"SELECT {JOB_COLUMNS} FROM jobs ORDER BY created DESC") \
+                .fetchall()
+        return [cls.__row2status(row) for row in rows]
+
+    @classmethod
+    def get_job(cls, job_id: str) -> StatusInfo | None:
+        with cls.__connect() as connection:
+            row = connection.execute(
+                f"SELECT {JOB_COLUMNS} FROM jobs WHERE job_id = ?",
+                (job_id,)).fetchone()
+        return cls.__row2status(row) if row else None
+
+    @classmethod
+    def get_result(cls, job_id: str) -> dict[str, Any] | None:
+        """
+        Returns the results of a successful job, None otherwise.
+        """
+        with cls.__connect() as connection:
+            row = connection.execute(
+                "SELECT result FROM jobs WHERE job_id = ? AND status = ?",
+                (job_id, StatusCode.successful.value)).fetchone()
+        return json.loads(row["result"]) if row else None
+
+    @classmethod
+    def dismiss(cls, job_id: str) -> StatusInfo | None:
+        """
+        Dismisses a job: cancels it if it has not started yet, and
+        discards its results otherwise.
+        """
+        future = cls.__futures.pop(job_id, None)
+        if future is not None:
+            future.cancel()
+
+        now = _now()
+        with cls.__connect() as connection:
+            connection.execute(
+                "UPDATE jobs SET status = ?, message = ?, result = NULL, " +
+                "updated = ? WHERE job_id = ?",
+                (StatusCode.dismissed.value, "Job dismissed", now, job_id))
+        return cls.get_job(job_id)
+
+    @classmethod
+    @contextmanager
+    def __connect(cls) -> Iterator[sqlite3.Connection]:
+        """
+        Opens a connection to the job store, committing on success.
+        """
+        with closing(sqlite3.connect(cls.__store, timeout=30)) as connection:
+            connection.row_factory = sqlite3.Row
+            with connection:
+                yield connection
+
+    @staticmethod
+    def __row2status(row: sqlite3.Row) -> StatusInfo:
+        return StatusInfo(
+            processID=row["process_id"],
+            type=JobType.process,
+            jobID=row["job_id"],
+            status=StatusCode(row["status"]),
+            message=row["message"],
+            created=row["created"],
+            started=row["started"],
+            finished=row["finished"],
+            updated=row["updated"],
+            progress=100 if row["status"] == StatusCode.successful.value
+            else None)
@@ -2,7 +2,7 @@ from .conformance import Conforms
 from .description import InputDescription, OutputDescription
 from .enums import ExceptionType, JobControlOptions, TransmissionMode
 from .execute import Execute
-from .job import StatusInfo
+from .job import JobList, StatusInfo
 from .landing_page import LandingPage
 from .link import Link
 from .process import (ProcessDescription, ProcessList, ProcessListItem,
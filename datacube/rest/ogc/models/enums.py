@@ -29,6 +29,8 @@ class ExceptionType(enum.Enum):
     URI_NOT_FOUND = "The requested URI was not found."
     SERVER_ERROR = "A server error occurred."
     NOT_IMPLEMENTED = "The endpoint is not implemented."
+    NO_SUCH_JOB = "The requested job does not exist."
+    RESULT_NOT_READY = "The results of the job are not available yet."
 
 
 class JobType(enum.Enum):
@@ -21,3 +21,8 @@ class StatusInfo(BaseModel):
     updated: datetime | None = Field(default=None)
     progress: int | None = Field(default=None, ge=0, le=100)
     links: list[Link] | None = Field(default=None)
+
+
+class JobList(BaseModel):
+    jobs: list[StatusInfo]
+    links: list[Link]
@@ -1,16 +1,21 @@
-from fastapi import APIRouter, status
+from functools import partial
+
+from fastapi import APIRouter, Header, Response, status
 from pydantic import BaseModel
 
 from datacube.core.models.cubeBuildResult import CubeBuildResult
 from datacube.core.models.exception import AbstractException as OGCException
 from datacube.core.models.request.cubeBuild import CubeBuildRequest
-from datacube.rest.cube_build import build_datacube_wrapper
+from datacube.rest.cube_build import (build_datacube_wrapper, run_build,
+                                      run_queued_build)
 from datacube.rest.models.restException import RESTException
+from datacube.rest.ogc.job import add_job_links
+from datacube.rest.ogc.job_manager import JobManager
 from datacube.rest.ogc.models import (ExceptionType, Execute,
                                       JobControlOptions, Link,
                                       ProcessDescription, ProcessList,
                                       ProcessListItem, ProcessSummary,
-                                      TransmissionMode)
+                                      StatusInfo, TransmissionMode)
 from datacube.rest.ogc.utils import base_model2description, execute2inputs
 from datacube.rest.server.server_configuration import ServerConfiguration
 
@@ -20,7 +25,9 @@ DC3_BUILDER_PROCESS = ProcessDescription(
     description="OGC description of a 'Datacube Builder' process",
     id="dc3-builder",
     version="1.0.0",
-    jobControlOptions=[JobControlOptions.sync_execute],
+    jobControlOptions=[JobControlOptions.sync_execute,
+                       JobControlOptions.async_execute,
+                       JobControlOptions.dismiss],
     outputTransmission=[TransmissionMode.reference],
     inputs=base_model2description(CubeBuildRequest),
     outputs=base_model2description(CubeBuildResult)
@@ -86,18 +93,39 @@ def get_process_summary(process_id: str):
                 status.HTTP_200_OK: {
                     'model': BaseModel
                     },
+                status.HTTP_201_CREATED: {
+                    'model': StatusInfo
+                    },
                 status.HTTP_404_NOT_FOUND: {
                     'model': RESTException
                 },
                 status.HTTP_422_UNPROCESSABLE_ENTITY: {
                     'model': RESTException
+                },
+                status.HTTP_429_TOO_MANY_REQUESTS: {
+                    'model': RESTException
                 }
              })
-def post_process_execute(process_id: str, execute: Execute):
+async def post_process_execute(process_id: str, execute: Execute,
+                               response: Response,
+                               prefer: str | None = Header(default=None)):
     if process_id not in PROCESSES.keys():
         raise OGCException(type=ExceptionType.URI_NOT_FOUND.value,
                            status=status.HTTP_404_NOT_FOUND,
                            detail=f"'{process_id}' is not a valid id.")
     process = PROCESSES[process_id]
+    input = process.input_model(**execute2inputs(execute))
+
+    # Execute asynchronously if requested and supported by the process.
+    # Both executions share the slots and the executor of /cube/build
+    if prefer is not None and "respond-async" in prefer \
+            and JobControlOptions.async_execute \
+            in process.process.jobControlOptions:
+        job = add_job_links(JobManager.submit(
+            process_id, partial(run_queued_build, process.method), input))
+        response.status_code = status.HTTP_201_CREATED
+        response.headers["Location"] = job.links[0].href
+        response.headers["Preference-Applied"] = "respond-async"
+        return job
 
-    return process.method(process.input_model(**execute2inputs(execute)))
+    return await run_build(process.method, input)
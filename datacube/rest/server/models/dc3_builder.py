@@ -8,3 +8,20 @@ class DC3BuilderConfiguration(BaseModel):
         description="Whether the app is launched in debug mode")
     pivot_format: bool | None = Field(
         description="Whether to put the datacube in pivot format")
+    job_store: str | None = Field(
+        description="Path to the SQLite database storing the OGC jobs")
+    job_workers: int | None = Field(
+        description="Number of OGC jobs that can be executed concurrently",
+        gt=0)
+    max_builds: int | None = Field(
+        description="Number of cubes that can be built concurrently " +
+                    "through the '/cube/build' endpoint", gt=0)
+    reprojection_memory: int | None = Field(
+        description="Memory budget in bytes to project the bands of " +
+                    "the rasters block by block", gt=0)
+    band_workers: int | None = Field(
+        description="Number of bands of a raster processed concurrently",
+        gt=0)
+    resumable_builds: bool | None = Field(
+        description="Whether a failed build resumes where it stopped " +
+                    "when the same request is submitted again")
@@ -9,6 +9,11 @@ from datacube.rest.server.models.server_configuration import \
 ROOT_PATH = Path(__file__).parent.parent.parent.parent
 LOGGER = Logger.get_logger()
 
+DEFAULT_JOB_STORE = "jobs.db"
+DEFAULT_JOB_WORKERS = 1
+DEFAULT_MAX_BUILDS = 1
+DEFAULT_BAND_WORKERS = 1
+
 
 class ServerConfiguration:
     conf_file = str(ROOT_PATH.joinpath("configs/app.conf.yml"))
@@ -40,3 +45,32 @@ class ServerConfiguration:
     def is_pivot_format(cls) -> bool:
         pivot_format = cls.get_server_conf().dc3_builder.pivot_format
         return pivot_format is not None and pivot_format
+
+    @classmethod
+    def get_job_store(cls) -> str:
+        job_store = cls.get_server_conf().dc3_builder.job_store
+        return job_store if job_store else DEFAULT_JOB_STORE
+
+    @classmethod
+    def get_job_workers(cls) -> int:
+        job_workers = cls.get_server_conf().dc3_builder.job_workers
+        return job_workers if job_workers else DEFAULT_JOB_WORKERS
+
+    @classmethod
+    def get_max_builds(cls) -> int:
+        max_builds = cls.get_server_conf().dc3_builder.max_builds
+        return max_builds if max_builds else DEFAULT_MAX_BUILDS
+
+    @classmethod
+    def get_reprojection_memory(cls) -> int | None:
+        return cls.get_server_conf().dc3_builder.reprojection_memory
+
+    @classmethod
+    def get_band_workers(cls) -> int:
+        band_workers = cls.get_server_conf().dc3_builder.band_workers
+        return band_workers if band_workers else DEFAULT_BAND_WORKERS
+
+    @classmethod
+    def is_resumable(cls) -> bool:
+        resumable = cls.get_server_conf().dc3_builder.resumable_builds
+        return resumable is not None and resumable